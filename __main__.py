@@ -1,11 +1,33 @@
-from pacman import app
-
-if __name__ == '__main__':
-    app = app.App()
-    app.run()
-
-
+import sys
+import argparse
 
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog="pacman")
+    parser.add_argument("--record", metavar="DIRECTORY", help="save a replay log of every game into DIRECTORY")
+    parser.add_argument("--replay", metavar="LOG", help="play back a recorded game")
+    parser.add_argument("--uncapped", action="store_true", help="run as fast as possible, not at the game's frame rate")
+    parser.add_argument("--headless", action="store_true", help="with --replay: no window, just check the log plays out the same, as fast as it goes")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--prescaled", action="store_true", help="draw straight to the window from pre-scaled sprites")
+    args = parser.parse_args()
+    if args.headless and not args.replay:
+        parser.error("--headless only goes with --replay")
 
+    if args.headless:
+        from pacman import replay
+        log = replay.SessionLog.load(args.replay)
+        bad_frame = replay.replay(log)
+        if bad_frame is not None:
+            print("replay diverged from the recording at frame {0}".format(bad_frame))
+            sys.exit(1)
+        print("replay matches the recording ({0} frames)".format(log.num_frames))
+    else:
+        from pacman import app
+        replay_log = None
+        if args.replay:
+            from pacman.replay import SessionLog
+            replay_log = SessionLog.load(args.replay)
 
+        app = app.App(args.record, replay_log, args.uncapped, args.seed, args.prescaled)
+        app.run()
@@ -1,97 +1,47 @@
-import pygame
+#  #####################################################################################################################
+#  Game events.
+#
+#  Every kind of event the game can raise has a fixed number, and the EventBus keeps one list of subscribers per
+#  number, made up front.  Publishing an event is a list index and a loop over whoever subscribed to it: no event
+#  objects are built, and an event nobody has subscribed to costs next to nothing.  Handlers are called with the
+#  event's arguments, as listed here:
+#
+#      PELLET_EATEN          (r, c)    pacman ate the pellet on tile (r, c)
+#      POWERPELLET_EATEN     (r, c)    pacman ate the power pellet on tile (r, c) (not raised yet: the rules don't
+#                                      have pacman eat power pellets)
+#      MODE_CHANGED          (mode)    the ghosts switched to "chase" or "scatter"
+#      PACMAN_DIED           ()        a ghost caught pacman
+#      LEVEL_CLEARED         ()        the last pellet has been eaten (power pellets aside)
+#      STATE_STARTED         (state)   the game has gone into "intro", "play" or "die"
+#  #####################################################################################################################
 
-# from https://www.geeksforgeeks.org/mimicking-events-python/
+PELLET_EATEN = 0
+POWERPELLET_EATEN = 1
+MODE_CHANGED = 2
+PACMAN_DIED = 3
+LEVEL_CLEARED = 4
+STATE_STARTED = 5
 
-# class Event(object):
-#
-#     def __init__(self):
-#         self.__eventhandlers = []
-#
-#     def __iadd__(self, handler):
-#         self.__eventhandlers.append(handler)
-#         return self
-#
-#     def __isub__(self, handler):
-#         self.__eventhandlers.remove(handler)
-#         return self
-#
-#     def __call__(self, *args, **keywargs):
-#         for eventhandler in self.__eventhandlers:
-#             eventhandler(*args, **keywargs)
-#
-#
-# class Police(object):
-#     def __init__(self, policeTelephoneNo):
-#         self._telephone = policeTelephoneNo
-#
-#     def CallPolice(self):
-#         print
-#         "police have been informed"
-#
-#
-# class Owner(object):
-#     def __init__(self, ownerMobile):
-#         self.__mobile = ownerMobile
-#
-#     def Message(self):
-#         print
-#         "owner has been messaged about the possible theft"
-#
-#
-# class Alarm(object):
-#
-#     def StartAlarm(self):
-#         print
-#         "Alarm has started"
-#
-#
-# # LockClass
-#
-# class Lock(object):
-#
-#     def __init__(self):
-#         self.OnLockBroken = Event()
-#
-#     def LockBroken(self):
-#         # This function will be executed once a lock is broken and will
-#         # raise an event
-#         self.OnLockBroken()
-#
-#     def AddSubscribersForLockBrokenEvent(self, objMethod):
-#         self.OnLockBroken += objMethod
-#
-#     def RemoveSubscribersForLockBrokenEvent(self, objMethod):
-#         self.OnLockBroken -= objMethod
-#
-#
-# def Simulation():
-#     # In the simulation we have a lock
-#     # which will be broken and the object of Police
-#     # owner and Alarm classes which are
-#     # to be notified as soon as lock is broke
-#
-#     # Required objects
-#     godrejLockObj = Lock()
-#     localPoliceObj = Police(100)
-#     ownerObj = Owner(99999999)
-#     mainDoorAlarmObj = Alarm()
-#
-#     # Setting these objects to receive the events from lock
-#     godrejLockObj.AddSubscribersForLockBrokenEvent(localPoliceObj.CallPolice)
-#     godrejLockObj.AddSubscribersForLockBrokenEvent(ownerObj.Message)
-#     godrejLockObj.AddSubscribersForLockBrokenEvent(mainDoorAlarmObj.StartAlarm)
-#
-#     # Now the Lock is broken by some burglar
-#     # thus LockBroken function will be called
-#     godrejLockObj.LockBroken()
-#
-#     # All three notifications must be printed
-#     # as soon as Lock is broken now
-#
-#     # You can also remove any receiver by
-#     # calling the RemoveSubscribersForLockBrokenEvent
-#     godrejLockObj.RemoveSubscribersForLockBrokenEvent(mainDoorAlarmObj.StartAlarm)
-#
-#
-# if __name__ == "__main__":
-#     Simulation()
\ No newline at end of file
+EVENT_NAMES = ("pellet_eaten", "powerpellet_eaten", "mode_changed", "pacman_died", "level_cleared", "state_started")
+NUM_EVENT_TYPES = len(EVENT_NAMES)
+
+
+
+
+class EventBus:
+    def __init__(self):
+        self._subscribers = [[] for _ in range(NUM_EVENT_TYPES)]
+
+    def subscribe(self, event_type, handler):
+        self._subscribers[event_type].append(handler)
+
+    def unsubscribe(self, event_type, handler):
+        self._subscribers[event_type].remove(handler)
+
+    def has_subscribers(self, event_type):
+        # for publishers that have work to do to get an event's arguments together
+        return len(self._subscribers[event_type]) > 0
+
+    def publish(self, event_type, *args):
+        for handler in self._subscribers[event_type]:
+            handler(*args)
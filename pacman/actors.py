@@ -115,6 +115,10 @@ class Actor(pygame.sprite.Sprite):
         self._current_animation_name = new_animation_name
         self._animations[self._current_animation_name].reset()
 
+    def rewind_animation(self):
+        # back to the first frame of the current animation, as a brand new actor would be
+        self._animations[self._current_animation_name].reset()
+
     @property
     def heading(self):
         return self._heading
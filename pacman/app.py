@@ -1,34 +1,52 @@
 import pygame
 import os
 import sys
+import time
+import random
 from pygame.locals import *
 from pacman.settings import *
-#from pacman.maze import MazeActor
-from pacman.maze import Pacman
-from pacman.maze import Blinky
-from pacman.maze import Pinky
-from pacman.maze import Inky
-from pacman.maze import Clyde
 #from pacman.actors import ActorAnimation
 #from pacman.spritesheet import Spritesheet
-from pacman.maze import Maze
-from pacman.timer import TimerManager
-from pacman.timer import Timer
+from pacman.scene import PlayingScene
+from pacman.scene import asset_loader
+from pacman.scene import clear_sounds
+from pacman import text
+from pacman.replay import SessionLog
+from pacman.replay import state_checksum
 
 
+KEY_HEADINGS = {K_UP: "up", K_DOWN: "down", K_LEFT: "left", K_RIGHT: "right"}
 
 
 
 class App:
-    def __init__(self):
+    def __init__(self, record_directory=None, replay_log=None, uncapped=False, seed=None, prescaled=False):
+        # record_directory: save a SessionLog of every game played in here
+        # replay_log: play this SessionLog back instead of taking the keyboard
+        # uncapped: run as fast as possible instead of at FRAME_RATE
+        # prescaled: draw straight onto the display from pre-scaled sprites (ScaledRenderer), not by scaling up frames
         self.display_screen = pygame.display.set_mode(DISPLAY_RESOLUTION.size, HWSURFACE | DOUBLEBUF | RESIZABLE)
         self.state = ""
+        self.record_directory = record_directory
+        self.replay_log = replay_log
+        self.uncapped = uncapped
+        self.prescaled = prescaled
+        self.scene = None  # the PlayingScene, made for the first game and kept for the rest
+        self.loader = None  # the AssetLoader getting the scene's files ready behind the start screen
+
+        if seed is None:
+            seed = replay_log.seed if replay_log is not None else int(time.time())
+        self.seed = seed
+        self.games_recorded = 0  # numbers the recordings, as two games can end in the same second
 
 
     def run(self):
         pygame.init()
 
         self.state = "start_screen"
+        if self.replay_log is not None:
+            self.state = "playing"
+
         while True:
             if self.state == "start_screen":
                 self.__start_screen()
@@ -37,6 +55,13 @@ class App:
             else:
                 break
 
+        # the scene's sounds, and the cached fonts (and text), don't outlive pygame
+        if self.loader is not None:
+            self.loader.finish()
+            self.loader = None
+        self.scene = None
+        clear_sounds()
+        text.clear_cache()
         pygame.quit()
 
 
@@ -44,6 +69,12 @@ class App:
     #  start_screen
     #  #################################################################################################################
     def __start_screen(self):
+        #  load everything the game needs in the background, while the player's looking at this
+        if self.scene is None and self.loader is None:
+            pygame.mixer.init()
+            self.loader = asset_loader()
+            self.loader.start()
+
         clock = pygame.time.Clock()
         running = True
         while running:
@@ -63,96 +94,55 @@ class App:
                     running = False
 
             self.display_screen.fill((0, 255, 255))
+
+            loader = self.loader
+            if loader is not None:
+                loader.poll()  # the loaded files are converted and put away here, on the main thread
+                if loader.done:
+                    # all there: make the scene now, so the game's ready the moment space is pressed
+                    self.loader = None
+                    self.scene = PlayingScene(self.display_screen, self.prescaled)
+                else:
+                    width, height = self.display_screen.get_size()
+                    pygame.draw.rect(self.display_screen, (0, 0, 0), (0, height - 8, int(width * loader.progress), 8))
+
             pygame.display.flip()
-            clock.tick()
+            clock.tick(FRAME_RATE)  # and leave the loader some time
 
 
     #  #################################################################################################################
     #  playing
     #  #################################################################################################################
     def __playing(self):
-        self.display_screen.fill((0, 0, 0))
-
-        #  game screen setup of this state
-        game_screen = pygame.Surface(GAME_RESOLUTION.size)
-        crop_screen = pygame.Surface(CROP_RESOLUTION.size)
-        background = pygame.Surface(GAME_RESOLUTION.size)
-
-        #  sounds
-        pygame.mixer.init()
-        siren_channel = pygame.mixer.Channel(0)
-        siren_sound = pygame.mixer.Sound(os.path.join('pacman', 'sounds', 'pacman_siren.wav'))
-        waka_channel = pygame.mixer.Channel(1)
-        waka_sound = pygame.mixer.Sound(os.path.join('pacman', 'sounds', 'pacman_Waka_Waka.wav'))
-        intro_channel = pygame.mixer.Channel(1)
-        intro_sound = pygame.mixer.Sound(os.path.join('pacman', 'sounds', 'pacman_Intro.wav'))
-        die_channel = pygame.mixer.Channel(1)
-        die_sound = pygame.mixer.Sound(os.path.join('pacman', 'sounds', 'pacman_Death.wav'))
-
-        #  set up the maze
-        maze = Maze()
-        maze.draw(background)  # draw the maze (the walls) onto the background surface
-        #game_screen.blit(background, (0, 0))  # draw the background onto the game_screen.
-
-        #  a group for the sprites (pacman, ghosts, pellets, fruit, etc..)
-        ghosts_group = pygame.sprite.Group()
-        pacman_group = pygame.sprite.GroupSingle()
-        pellets = pygame.sprite.Group()
-
-        #  make the actors
-        pacman = Pacman(maze, (15 * 8, 22 * 8 + 4), "left", PACMAN_STARTING_SPEED, 30)
-        pacman.freeze()
-        pacman_group.add(pacman)
-
-        blinky = Blinky(maze, (15 * 8, 10 * 8 + 4), "right", GHOST_STARTING_SPEED, 20)
-        blinky.freeze()
-        blinky.mode = "scatter"
-        ghosts_group.add(blinky)
-
-        pinky = Pinky(maze, (15 * 8, 10 * 8 + 4), "left", GHOST_STARTING_SPEED, 20)
-        pinky.freeze()
-        pinky.mode = "scatter"
-        ghosts_group.add(pinky)
-
-        inky = Inky(maze, (15 * 8, 10 * 8 + 4), "left", GHOST_STARTING_SPEED, 20)
-        inky.freeze()
-        inky.mode = "scatter"
-        ghosts_group.add(inky)
-
-        clyde = Clyde(maze, (15 * 8, 10 * 8 + 4), "left", GHOST_STARTING_SPEED, 20)
-        clyde.freeze()
-        clyde.mode = "scatter"
-        ghosts_group.add(clyde)
-
-        maze.add_actor(pacman.name, pacman)
-        maze.add_actor(blinky.name, blinky)
-        maze.add_actor(pinky.name, pinky)
-        maze.add_actor(inky.name, inky)
-        maze.add_actor(clyde.name, clyde)
-
-        #  add the pellets to the all_sprites group
-        for p in maze.pellets:
-            pellets.add(p)
+        #  everything's loaded the first time, and just reset for every game after
+        random.seed(self.seed)
+        if self.loader is not None:
+            self.loader.finish()  # space was pressed before the loader was done
+            self.loader = None
+        if self.scene is None:
+            self.scene = PlayingScene(self.display_screen, self.prescaled)
+        scene = self.scene
+        scene.start(self.display_screen)
+        sim = scene.sim
+
+        #  recording this game, or playing back an old one?
+        replay_log = self.replay_log
+        diverged = False
+        log = None
+        if replay_log is None and self.record_directory is not None:
+            log = SessionLog(self.seed)
 
 
         #  each keydown event adds to the key_stack and is popped (and processed) on keyup
         key_stack = []
 
-        prev_state = ""
-        first_pass = True
-
-        state = "intro"
-        state_timer = Timer(0, True, "")
-
-        chase_scatter_timers = TimerManager()
-
 
 
         # let's do it!
         clock = pygame.time.Clock()
         running = True
         while running:
-            game_screen.blit(background, (0, 0))  # draw the background onto the game_screen.
+            scene.renderer.begin_frame()  # rub out last frame's sprites and text, leaving the maze behind
 
             #  --- Event Handling --------------------------------------------
             for event in pygame.event.get():
@@ -163,6 +153,7 @@ class App:
                     DISPLAY_RESOLUTION.height = event.h
                     DISPLAY_RESOLUTION.width = event.w
                     self.display_screen = pygame.display.set_mode(DISPLAY_RESOLUTION.size, HWSURFACE | DOUBLEBUF | RESIZABLE)
+                    scene.resize(self.display_screen)
                 elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                     self.state = "start_screen"
                     running = False
@@ -175,212 +166,48 @@ class App:
 
 
 
-            #  --- State handling of the game screen --------------------------------------------
-            if state == "intro":
-                draw_text(game_screen, "Ready!", "arcadeclassic", 18, (100, 130), (255, 255, 0))
-
-                if first_pass:
-                    # intro_channel.set_volume(0)
-                    intro_channel.play(intro_sound, 0)  # we wait for the sound to stop, and transition to state = "play"
-
-                    pacman.reset()
-                    blinky.reset()
-                    pinky.reset()
-                    inky.reset()
-                    clyde.reset()
-
-                    pacman.freeze()
-                    blinky.freeze()
-                    pinky.freeze()
-                    inky.freeze()
-                    clyde.freeze()
-                else:
-                    if intro_channel.get_sound() is None:
-                        state = "play"
-
-
-
-
-            # --- Pacman dies -------------------------------------------------------------------------------------------------------------------
-            elif state == "die":
-                if first_pass:
-                    die_channel.play(die_sound, 0)
-                    pacman.movement_speed = 0
-                    pacman.set_animation("die")
-                    pacman.animation_speed = 7.75
-                else:
-                    if state_timer.get_elapsed_time() > 2650:
-                        state = "intro"
-
-
-
-
-
-            # --- Play! -------------------------------------------------------------------------------------------------------------------------
-            elif state == "play":
-                if first_pass:
-                    # start in scatter mode
-                    blinky.scatter()
-                    pinky.scatter()
-                    inky.scatter()
-                    clyde.scatter()
-
-                    chase_scatter_timers.add_timer(1, 7000, True, "chase")  # scatter for  7 seconds, then chase
-                    chase_scatter_timers.add_timer(2, 27000, True, "scatter")  # chase for 20 seconds, then scatter
-                    chase_scatter_timers.add_timer(3, 34000, True, "chase")  # scatter for  7 seconds, then chase
-                    chase_scatter_timers.add_timer(4, 54000, True, "scatter")  # chase for 20 seconds, then scatter
-                    chase_scatter_timers.add_timer(5, 59000, True, "chase")  # scatter for  5 seconds, then chase
-                    chase_scatter_timers.add_timer(6, 79000, True, "scatter")  # chase for 20 seconds, then scatter
-                    chase_scatter_timers.add_timer(7, 84000, True, "chase")  # scatter for  5 seconds, then chase
-
-                    pacman.thaw()
-                    blinky.thaw()
-                    pinky.thaw()
-                    inky.thaw()
-                    clyde.thaw()
-
-                    if siren_channel.get_sound() is None:
-                        siren_channel.play(siren_sound, -1)
-
-                #  --- Any pacman/ghost collision? --------------------------------
-                if pacman.current_tile_center() == blinky.current_tile_center() \
-                or pacman.current_tile_center() == pinky.current_tile_center() \
-                or pacman.current_tile_center() == inky.current_tile_center() \
-                or pacman.current_tile_center() == clyde.current_tile_center():
-                    siren_channel.stop()
-                    chase_scatter_timers.stop_all()
-                    state = "die"
-
-                #  --- Any timers? ------------------------------------------------
-                elapsed_timers = chase_scatter_timers.get_elapsed_timers()
-                for key, elapsed_timer in elapsed_timers.items():
-                    if elapsed_timer.tag == "chase":
-                        print("chase!")
-                        blinky.chase()
-                        pinky.chase()
-                        inky.chase()
-                        clyde.chase()
-                    elif elapsed_timer.tag == "scatter":
-                        print("scatter!")
-                        blinky.scatter()
-                        pinky.scatter()
-                        inky.scatter()
-                        clyde.scatter()
-
-                    chase_scatter_timers.remove_timer(key)
-
-                #  --- Where to next for pacman? ----------------------------------
-                if len(key_stack) > 0:
-                    if key_stack[-1] == K_UP:
-                        pacman.set_desired_heading("up")
-                    elif key_stack[-1] == K_DOWN:
-                        pacman.set_desired_heading("down")
-                    elif key_stack[-1] == K_LEFT:
-                        pacman.set_desired_heading("left")
-                    elif key_stack[-1] == K_RIGHT:
-                        pacman.set_desired_heading("right")
-                else:
-                    pacman.cancel_desired_heading()
-
-
-
-                #  --- Are we far enough into this tile to have eaten a pellet? ------------------
-                #  A tile with a pellet is 8x8 like this:
-                #  00000000
-                #  00000000
-                #  00000000
-                #  00011000
-                #  00011000
-                #  00000000
-                #  00000000
-                #  00000000
-
-                eat = False
-                if pacman.heading == "left":
-                    t = maze.get_tile_from_screen((pacman.rect.x + 4, pacman.rect.y + 4))
-                    if t.tile_type == "pellet" and t.draw_style != "none":
-                        if pacman.rect.x + 4 < t.x + 4:
-                            eat = True
-                elif pacman.heading == "right":
-                    t = maze.get_tile_from_screen((pacman.rect.x + 4, pacman.rect.y + 4)).get_neighbour_tile("right")
-                    if t.tile_type == "pellet" and t.draw_style != "none":
-                        if pacman.rect.x + 4 + 7 >= t.x + 4:
-                            eat = True
-                elif pacman.heading == "up":
-                    t = maze.get_tile_from_screen((pacman.rect.x + 4, pacman.rect.y + 4))
-                    if t.tile_type == "pellet" and t.draw_style != "none":
-                        if pacman.rect.y + 4 < t.y + 4:
-                            eat = True
-                elif pacman.heading == "down":
-                    t = maze.get_tile_from_screen((pacman.rect.x + 4, pacman.rect.y + 4)).get_neighbour_tile("down")
-                    if t.tile_type == "pellet" and t.draw_style != "none":
-                        if pacman.rect.y + 4 + 7 >= t.y + 4:
-                            eat = True
-
-                if eat:
-                    if waka_channel.get_sound() is None:
-                        waka_channel.play(waka_sound, 0)
-
-                    # noinspection PyUnboundLocalVariable
-                    t.kill()
-                    t.draw_style = "none"
-
-                if pacman.rect.x < 0:
-                    pacman.x = GAME_RESOLUTION.width - 16
-                elif pacman.rect.x > GAME_RESOLUTION.width - 16:
-                    pacman.x = 4
-
-
-
-            #  clear/erase the sprites, wherever they may be, leaving the background behind.
-            #  After this, the game_screen is just the background again, with no sprites on it.
-            pellets.clear(game_screen, background)
-            pacman_group.clear(game_screen, background)
-            ghosts_group.clear(game_screen, background)
-
-            pellets.draw(game_screen)
-
-            if pacman.current_animation_name == "die":
-                pass
+            #  --- Where to next for pacman? ----------------------------------
+            direction = ""
+            if replay_log is not None:
+                if sim.frame >= replay_log.num_frames:
+                    self.state = "quit"
+                    break
+                direction = replay_log.direction(sim.frame)
+            elif len(key_stack) > 0:
+                direction = KEY_HEADINGS[key_stack[-1]]
 
-            pacman_group.update()
-            ghosts_group.update()  # have all the sprites configure themselves as they see fit (move, resize, set colors, set image, etc..)  ie, get them ready for the next frame
+            #  --- Run the game for a frame (the scene's handlers react) -------
+            sim.step(direction)
 
-            pacman_group.draw(game_screen)
-            if pacman.current_animation_name != "die":
-                ghosts_group.draw(game_screen)  # redraw all the sprites to the game screen.
+            if log is not None:
+                log.record(direction, sim)
+            elif replay_log is not None and not diverged and state_checksum(sim) != replay_log.checksums[sim.frame - 1]:
+                print("replay diverged from the recording at frame {0}".format(sim.frame - 1), file=sys.stderr)
+                diverged = True
 
-            crop_screen.blit(game_screen, (-16, 0))
-            self.display_screen.blit(pygame.transform.scale(crop_screen, DISPLAY_RESOLUTION.size), (0, 0))  # with game_screen ready to be shown, draw it to the display_screen
-            pygame.display.flip()  # and now, finally, do the actual update of the display itself
+            scene.draw()  # the sprites follow the simulation, and what's changed goes up on the display
 
 
-            clock.tick(FRAME_RATE)
-            #print("time {0}, pacman (x,y) = ({1},{2})".format(pygame.time.get_ticks(), pacman.rect.x, pacman.rect.y))
-            if prev_state != state:
-                first_pass = True
-                state_timer.start()
+            if self.uncapped:
+                clock.tick()
             else:
-                first_pass = False
-
-            prev_state = state
+                clock.tick(FRAME_RATE)
         #  --- Done (clean up) ----------------------------------------------------------------
-        if not siren_channel.get_sound() is None:
-            siren_channel.stop()
-        if not waka_channel.get_sound() is None:
-            waka_channel.stop()
-        pygame.mixer.quit()
-
-
-
-def draw_text(screen, text, font_name, size, position, color):
-    font = pygame.font.Font(os.path.join("pacman", "fonts", font_name + ".ttf"), size)
-    t = font.render(text, False, color)
-    screen.blit(t, position)
-
-
-
-
-
+        if log is not None and log.num_frames > 0:
+            self.__save_recording(log)
 
+        scene.stop()  # the mixer, and everything else, stays up for the next game
 
+    def __save_recording(self, log):
+        # session_<date>_<time>_<seed>_<game>.pacrec in record_directory, skipping any name that's already taken (by
+        # another App with the same seed, say)
+        os.makedirs(self.record_directory, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        while True:
+            self.games_recorded += 1
+            file_name = "session_{0}_{1}_{2}.pacrec".format(timestamp, self.seed, self.games_recorded)
+            try:
+                log.save(os.path.join(self.record_directory, file_name))
+                return
+            except FileExistsError:
+                pass
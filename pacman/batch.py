@@ -0,0 +1,419 @@
+import numpy as np
+from pacman.game_settings import *
+from pacman.grid import *
+from pacman.simulation import SUBPIXELS
+from pacman.simulation import TILE_SUBPIXELS
+from pacman.simulation import frames_from_ms
+
+
+#  #####################################################################################################################
+#  Many games at once, stepped in lockstep.
+#
+#  BatchSimulation keeps the state of num_games independent games in NumPy arrays, one row per game, and moves every
+#  game on by a frame per step().  The rules are Simulation's, to the subpixel: given the same directions, game n
+#  of a batch goes exactly the way a Simulation would.  Only the per-actor work is done column by column (pacman,
+#  then each ghost in turn, as Simulation updates them), with all the games in each column handled at once.
+#
+#  Everything is coded as small integers:
+#
+#      headings, directions   index into EXIT_ORDER (0 up, 1 left, 2 down, 3 right), -1 for none
+#      state                  STATE_INTRO, STATE_PLAY, STATE_DIE
+#      mode                   MODE_CHASE, MODE_SCATTER
+#      actors                 columns PACMAN, BLINKY, PINKY, INKY, CLYDE
+#
+#  Pellets are a bitset per game, one bit per maze cell, set while the pellet is still there.
+#  #####################################################################################################################
+
+HEADINGS = tuple(heading for heading, exit_bit, dr, dc in EXIT_ORDER)
+NO_HEADING = -1
+
+STATE_INTRO = 0
+STATE_PLAY = 1
+STATE_DIE = 2
+STATE_NAMES = ("intro", "play", "die")
+
+MODE_CHASE = 0
+MODE_SCATTER = 1
+MODE_NAMES = ("chase", "scatter")
+
+PACMAN = 0
+BLINKY = 1
+PINKY = 2
+INKY = 3
+CLYDE = 4
+ACTOR_NAMES = ("Pacman", "Blinky", "Pinky", "Inky", "Clyde")
+NUM_ACTORS = len(ACTOR_NAMES)
+
+#  per heading index
+_DR = np.array([dr for heading, exit_bit, dr, dc in EXIT_ORDER], dtype=np.int64)
+_DC = np.array([dc for heading, exit_bit, dr, dc in EXIT_ORDER], dtype=np.int64)
+_SIGN = np.array([-1, -1, 1, 1], dtype=np.int64)  # up and left are towards 0
+
+_STARTING_POSITIONS = (PACMAN_STARTING_POSITION,) + (GHOST_STARTING_POSITION,) * 4
+_STARTING_HEADINGS = ("left", "right", "left", "left", "left")
+_STARTING_SPEEDS = (PACMAN_STARTING_SPEED,) + (GHOST_STARTING_SPEED,) * 4
+
+_SCATTER_TARGETS = {BLINKY: (220, -12), PINKY: (36, -12), INKY: (236, 260), CLYDE: (20, 260)}
+
+_SCHEDULE_FRAMES = np.array([frames_from_ms(ms) for ms, mode in CHASE_SCATTER_SCHEDULE], dtype=np.int64)
+_SCHEDULE_MODES = np.array([MODE_NAMES.index(mode) for ms, mode in CHASE_SCATTER_SCHEDULE], dtype=np.int8)
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+
+
+class BatchSimulation:
+    def __init__(self, num_games, tile_map=MAZE_MAP):
+        self.num_games = num_games
+        self.grid = MazeGrid(tile_map)
+        self.num_rows = self.grid.num_rows
+        self.num_columns = self.grid.num_columns
+
+        cells = np.frombuffer(bytes(self.grid.cells), dtype=np.uint8)
+        self._walls = cells == TILE_WALL
+        self._exits = np.frombuffer(bytes(self.grid.exits), dtype=np.uint8).astype(np.int64)
+        self._fresh_pellets = np.packbits(cells == TILE_PELLET, bitorder="little")
+        self._num_powerpellets = int(np.count_nonzero(cells == TILE_POWERPELLET))  # never eaten, so always there
+
+        n = num_games
+        self.fx = np.zeros((n, NUM_ACTORS), dtype=np.int64)  # positions, in subpixels
+        self.fy = np.zeros((n, NUM_ACTORS), dtype=np.int64)
+        self.heading = np.zeros((n, NUM_ACTORS), dtype=np.int64)
+        self.queued_heading = np.zeros((n, NUM_ACTORS), dtype=np.int64)
+        self.speed = np.zeros((n, NUM_ACTORS), dtype=np.int64)  # subpixels per second
+        self.speed_remainder = np.zeros((n, NUM_ACTORS), dtype=np.int64)
+        self.frozen = np.zeros((n, NUM_ACTORS), dtype=bool)
+        self.mode = np.zeros((n, NUM_ACTORS), dtype=np.int8)
+        self.dying = np.zeros(n, dtype=bool)
+        self.pellets = np.zeros((n, len(self._fresh_pellets)), dtype=np.uint8)
+
+        # pacman's tile, that the ghosts chase (Simulation's flow field target)
+        self.target_r = np.zeros(n, dtype=np.int64)
+        self.target_c = np.zeros(n, dtype=np.int64)
+
+        self.frame = np.zeros(n, dtype=np.int64)
+        self.state = np.zeros(n, dtype=np.int8)
+        self.state_frame = np.zeros(n, dtype=np.int64)
+        self.first_pass = np.zeros(n, dtype=bool)
+        self._prev_state = np.zeros(n, dtype=np.int8)
+        self._schedule_next = np.zeros(n, dtype=np.int64)  # next CHASE_SCATTER_SCHEDULE entry due, per game
+
+        # what happened during the last step
+        self.started_state = np.zeros(n, dtype=np.int8)  # or -1
+        self.collided = np.zeros(n, dtype=bool)
+        self.eaten = np.zeros(n, dtype=np.int64)
+
+        self.reset()
+
+    def reset(self, games=None):
+        # start the given games (an index array or mask, or all of them) over from scratch, as a new Simulation
+        if games is None:
+            games = slice(None)
+
+        self._reset_actors(games)
+        self.frozen[games] = True
+        self.mode[games] = MODE_SCATTER
+        self.pellets[games] = self._fresh_pellets
+
+        self.frame[games] = 0
+        self.state[games] = STATE_INTRO
+        self.state_frame[games] = 0
+        self.first_pass[games] = True
+        self._prev_state[games] = -1
+        self._schedule_next[games] = len(_SCHEDULE_FRAMES)
+
+        self.started_state[games] = -1
+        self.collided[games] = False
+        self.eaten[games] = 0
+
+    def pellets_remaining(self):
+        return _POPCOUNT[self.pellets].sum(axis=1) + self._num_powerpellets
+
+    def step(self, directions=None):
+        # Advance every game by one frame.  directions is one heading index per game (or NO_HEADING), for the way
+        # each player is pushing
+        if directions is None:
+            directions = np.full(self.num_games, NO_HEADING, dtype=np.int64)
+        directions = np.asarray(directions)
+
+        self.started_state[:] = np.where(self.first_pass, self.state, -1)
+        self.collided[:] = False
+        self.eaten[:] = 0
+        state = self.state.copy()
+        eats_pellets = state == STATE_PLAY
+
+        self._intro(state == STATE_INTRO)
+        self._die(state == STATE_DIE)
+        self._play(state == STATE_PLAY, directions)
+
+        self._update_actor(PACMAN, eats_pellets)
+        self.frozen[self.dying, PACMAN] = False  # keep the death animation playing
+        self.target_r[:], self.target_c[:] = self.tile_address(PACMAN)
+        for a in (BLINKY, PINKY, INKY, CLYDE):
+            self._update_actor(a)
+
+        self.frame += 1
+        changed = self._prev_state != self.state
+        self.first_pass[:] = changed
+        self.state_frame[:] = np.where(changed, 0, self.state_frame + 1)
+        self._prev_state[:] = self.state
+
+    #  --- states ------------------------------------------------------------------------------------------------------
+    def _intro(self, intro):
+        starting = np.flatnonzero(intro & self.first_pass)
+        if starting.size:
+            self._reset_actors(starting)
+            self.frozen[starting] = True
+
+        self.state[intro & ~self.first_pass & (self.state_frame >= frames_from_ms(INTRO_TIME))] = STATE_PLAY
+
+    def _die(self, die):
+        dying = die & self.first_pass
+        self.dying[dying] = True
+        self.speed[dying, PACMAN] = 0
+
+        self.state[die & ~self.first_pass & (self.state_frame > frames_from_ms(DIE_TIME))] = STATE_INTRO
+
+    def _play(self, playing, directions):
+        starting = np.flatnonzero(playing & self.first_pass)
+        if starting.size:
+            # start in scatter mode
+            self._set_ghost_mode(starting, MODE_SCATTER)
+            self._schedule_next[starting] = 0
+            self.frozen[starting] = False
+
+        #  --- Any pacman/ghost collision? --------------------------------
+        pacman_r, pacman_c = self.tile_address(PACMAN)
+        collided = np.zeros(self.num_games, dtype=bool)
+        for a in (BLINKY, PINKY, INKY, CLYDE):
+            r, c = self.tile_address(a)
+            collided |= (r == pacman_r) & (c == pacman_c)
+        collided &= playing
+        self.collided[:] = collided
+        self._schedule_next[collided] = len(_SCHEDULE_FRAMES)
+        self.state[collided] = STATE_DIE
+
+        #  --- Time to switch between chase and scatter? ------------------
+        while True:
+            due = playing & (self._schedule_next < len(_SCHEDULE_FRAMES))
+            due[due] = _SCHEDULE_FRAMES[self._schedule_next[due]] <= self.state_frame[due]
+            games = np.flatnonzero(due)
+            if not games.size:
+                break
+            modes = _SCHEDULE_MODES[self._schedule_next[games]]
+            for mode in (MODE_CHASE, MODE_SCATTER):
+                self._set_ghost_mode(games[modes == mode], mode)
+            self._schedule_next[games] += 1
+
+        #  --- Where to next for pacman? ----------------------------------
+        self.queued_heading[playing, PACMAN] = directions[playing]
+
+    #  --- actors ------------------------------------------------------------------------------------------------------
+    def _reset_actors(self, games):
+        for a in range(NUM_ACTORS):
+            self.fx[games, a] = _STARTING_POSITIONS[a][0] * SUBPIXELS
+            self.fy[games, a] = _STARTING_POSITIONS[a][1] * SUBPIXELS
+            self.heading[games, a] = HEADINGS.index(_STARTING_HEADINGS[a])
+            self.speed[games, a] = int(round(_STARTING_SPEEDS[a] * SUBPIXELS))
+        self.queued_heading[games] = NO_HEADING
+        self.speed_remainder[games] = 0
+        self.frozen[games] = False
+        self.mode[games, BLINKY:] = MODE_CHASE
+        self.dying[games] = False
+        self.target_r[games], self.target_c[games] = self.tile_address(PACMAN, games)
+
+    def _set_ghost_mode(self, games, mode):
+        # every ghost switches mode, and turns around
+        self.mode[games, BLINKY:] = mode
+        self.queued_heading[games, BLINKY:] = (self.heading[games, BLINKY:] + 2) % 4
+
+    def tile_address(self, a, games=slice(None), fx=None, fy=None):
+        # (r, c) of the tile under the actor's centre, as SimActor.current_tile_address()
+        if fx is None:
+            fx = self.fx[games, a]
+            fy = self.fy[games, a]
+        return (fy + 7 * SUBPIXELS) // TILE_SUBPIXELS, (fx + 7 * SUBPIXELS) // TILE_SUBPIXELS % self.num_columns
+
+    def _is_wall(self, r, c):
+        return self._walls[r * self.num_columns + c % self.num_columns]
+
+    def _eat(self, games, fx, fy, heading):
+        # SimPacman._visit(): eat the pellet pacman is far enough into, in each of the games
+        x = fx // SUBPIXELS
+        y = fy // SUBPIXELS
+        r = (y + 4) // 8
+        c = (x + 4) // 8
+
+        left = heading == 1
+        right = heading == 3
+        up = heading == 0
+        down = heading == 2
+        c = c + right
+        r = r + down
+        eat = ((left & (x + 4 < c * 8 + 4))
+               | (right & (x + 4 + 7 >= c * 8 + 4))
+               | (up & (y + 4 < r * 8 + 4))
+               | (down & (y + 4 + 7 >= r * 8 + 4)))
+
+        i = r * self.num_columns + c % self.num_columns
+        byte = i >> 3
+        bit = (1 << (i & 7)).astype(np.uint8)
+        eat &= (self.pellets[games, byte] & bit) != 0
+
+        games = games[eat]
+        self.pellets[games, byte[eat]] &= ~bit[eat]
+        self.eaten[games] += 1
+
+    def _target_coordinates(self, a, games, fx, fy):
+        # the ghost targeting rules of SimBlinky, SimPinky, SimInky and SimClyde, for ghost a in each of the games
+        tr = self.target_r[games]
+        tc = self.target_c[games]
+        tx = tc * 8 + 4
+        ty = tr * 8 + 4
+
+        if a == PINKY or a == INKY:
+            ahead = 4 if a == PINKY else 2
+            pacman_heading = self.heading[games, PACMAN]
+            tx = tx + _DC[pacman_heading] * ahead * 8 - (pacman_heading == 0) * ahead * 8
+            ty = ty + _DR[pacman_heading] * ahead * 8
+            if a == INKY:
+                # start at blinky's tile, head to the point in front of pacman, and double the distance
+                blinky_r, blinky_c = self.tile_address(BLINKY, games)
+                tx = tx + (tx - (blinky_c * 8 + 4))
+                ty = ty + (ty - (blinky_r * 8 + 4))
+        elif a == CLYDE:
+            r, c = self.tile_address(a, fx=fx, fy=fy)
+            dx = (tc - c) * 8
+            dy = (tr - r) * 8
+            near = dx * dx + dy * dy < (8 * 8) ** 2
+            tx = np.where(near, 4, tx)
+            ty = np.where(near, 260, ty)
+
+        scatter = self.mode[games, a] == MODE_SCATTER
+        sx, sy = _SCATTER_TARGETS[a]
+        return np.where(scatter, sx, tx), np.where(scatter, sy, ty)
+
+    def _next_headings(self, a, games, fx, fy, heading):
+        # SimActor.get_next_heading(): the exit out of the current tile that lands closest to the target
+        tx, ty = self._target_coordinates(a, games, fx, fy)
+        r, c = self.tile_address(a, fx=fx, fy=fy)
+        exits = self._exits[r * self.num_columns + c] & ~(1 << ((heading + 2) % 4))
+
+        distances = np.empty((len(games), 4), dtype=np.int64)
+        for k in range(4):
+            dx = tx - ((c + _DC[k]) % self.num_columns * 8 + 4)
+            dy = ty - ((r + _DR[k]) * 8 + 4)
+            distances[:, k] = np.where(exits & (1 << k), dx * dx + dy * dy, 999999 ** 2)
+
+        best = distances.argmin(axis=1)
+        return np.where(distances[np.arange(len(games)), best] < 999999 ** 2, best, heading)
+
+    def _update_actor(self, a, eats_pellets=None):
+        # SimActor._update_frame() for actor a, in every game at once
+        S = SUBPIXELS
+        T = TILE_SUBPIXELS
+
+        if eats_pellets is not None:
+            games = np.flatnonzero(eats_pellets)
+            self._eat(games, self.fx[games, a], self.fy[games, a], self.heading[games, a])
+
+        g = np.flatnonzero(~((self.queued_heading[:, a] == NO_HEADING) & self.frozen[:, a]))
+        if not g.size:
+            return
+
+        heading = self.heading[g, a]
+        queued = self.queued_heading[g, a]
+        q = np.where(queued == NO_HEADING, heading, queued)  # the local queued_heading
+        fx = self.fx[g, a]
+        fy = self.fy[g, a]
+        start_fx = fx.copy()
+        start_fy = fy.copy()
+        cx = fx + 4 * S
+        cy = fy + 4 * S
+
+        p, remainder = np.divmod(self.speed[g, a] + self.speed_remainder[g, a], FRAME_RATE)
+
+        # part 1:  get to next tile, or an instant 180 degree turnaround (which SimActor only makes from down or right)
+        direction = np.where((q == (heading + 2) % 4) & (heading >= 2), q, heading)
+        vertical = direction % 2 == 0
+        sign = _SIGN[direction]
+        distance_to_next_tile = (-sign * np.where(vertical, cy, cx)) % T
+        d1 = sign * np.minimum(p, distance_to_next_tile)
+        dx1 = np.where(vertical, 0, d1)
+        dy1 = np.where(vertical, d1, 0)
+        dx2 = np.zeros_like(dx1)
+        dy2 = np.zeros_like(dy1)
+
+        # part 2:  past the tile break (maybe a turn?), again for each further break reached this frame
+        j = np.flatnonzero(p > distance_to_next_tile)
+        while j.size:
+            h = heading[j]
+            if a == PACMAN:
+                nq = queued[j]
+            else:
+                nq = self._next_headings(a, g[j], fx[j], fy[j], h)
+            nq = np.where(nq == NO_HEADING, h, nq)
+
+            r = (cy[j] + dy1[j]) // T
+            c = (cx[j] + dx1[j]) // T
+
+            # a 90 degree turn into a wall is ignored
+            turning = (h - nq) % 2 == 1
+            nq = np.where(turning & self._is_wall(r + _DR[nq], c + _DC[nq]), h, nq)
+
+            blocked = self._is_wall(r + _DR[nq], c + _DC[nq])
+            remainder[j[blocked]] = 0  # stopped short at the wall, so nothing carries over
+
+            pj = p[j]
+            nq_vertical = nq % 2 == 0
+            nq_sign = _SIGN[nq]
+            dx2[j] = np.where(blocked | nq_vertical, 0, nq_sign * pj - dx1[j])
+            dy2[j] = np.where(blocked | ~nq_vertical, 0, nq_sign * pj - dy1[j])
+
+            turned = ~blocked & (nq != h)
+            heading[j[turned]] = nq[turned]
+            queued[j[turned]] = NO_HEADING
+            q[j] = nq
+
+            # part 2 runs on past another tile break: go a tile into it, and decide again from just short of it
+            d2 = np.abs(dx2[j] + dy2[j])
+            more = d2 > T
+            j = j[more]
+            if not j.size:
+                break
+            nq = nq[more]
+            p[j] = d2[more]
+            cx[j] += dx1[j]
+            cy[j] += dy1[j]
+            dx1[j] = _DC[nq] * T
+            dy1[j] = _DR[nq] * T
+            dx2[j] = 0
+            dy2[j] = 0
+            fx[j] = cx[j] + dx1[j] - _DC[nq] - 4 * S
+            fy[j] = cy[j] + dy1[j] - _DR[nq] - 4 * S
+            if eats_pellets is not None:
+                eating = eats_pellets[g[j]]
+                self._eat(g[j][eating], fx[j][eating], fy[j][eating], heading[j][eating])
+
+        # was this a 180 turnaround?
+        turned = q == (heading + 2) % 4
+        heading[turned] = q[turned]
+        queued[turned] = NO_HEADING
+
+        fx = cx + dx1 + dx2 - 4 * S
+        fy = cy + dy1 + dy2 - 4 * S
+
+        frozen = self.frozen[g, a]
+        self.frozen[g, a] = ~frozen & (fx == start_fx) & (fy == start_fy)
+
+        # corridor
+        c = (fx + 4 * S) // T
+        fx += np.where((c <= 0) & (heading == 1), (self.num_columns * 8 - 16) * S, 0)
+        fx -= np.where((c >= 30) & (heading == 3), (self.num_columns * 8 - 16) * S, 0)
+
+        self.fx[g, a] = fx
+        self.fy[g, a] = fy
+        self.heading[g, a] = heading
+        self.queued_heading[g, a] = queued
+        self.speed_remainder[g, a] = remainder
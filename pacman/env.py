@@ -0,0 +1,214 @@
+import os
+import multiprocessing
+import numpy as np
+from pacman.grid import *
+from pacman.simulation import Simulation
+from pacman.simulation import SUBPIXELS
+from pacman.observation import TileObservation
+from pacman.observation import NUM_CHANNELS
+
+
+#  #####################################################################################################################
+#  The game as an environment for agents, gym style:
+#
+#      observation = env.reset()
+#      observation, reward, done, info = env.step(action)
+#
+#  An episode is one life: it starts at the beginning of "play" (the intro is skipped) and is done when a ghost
+#  catches pacman, or when the last pellet is eaten.  Each pellet eaten scores PELLET_REWARD, being caught scores
+#  DEATH_REWARD.
+#
+#  PacmanVectorEnv runs many of these over a pool of worker processes.  The workers write observations straight into
+#  one block of shared memory, so only the actions, rewards and dones go through the pipes.
+#  #####################################################################################################################
+
+ACTIONS = ("", "up", "left", "down", "right")  # action number -> direction pushed ("" for none)
+NUM_ACTIONS = len(ACTIONS)
+
+PELLET_REWARD = 1.0
+DEATH_REWARD = -10.0
+
+#  observation types:
+#      "vector"   for each actor (pacman, blinky, pinky, inky, clyde) its x, y and heading, then each ghost's mode
+#      "tiles"    the TileObservation planes (see observation.py)
+HEADING_NUMBERS = {heading: i for i, (heading, exit_bit, dr, dc) in enumerate(EXIT_ORDER)}
+MODE_NUMBERS = {"chase": 0, "scatter": 1}
+OBSERVATION_TYPES = {"vector": ((5 * 3 + 4,), np.int16),
+                     "tiles":  ((NUM_CHANNELS, len(MAZE_MAP), len(MAZE_MAP[0])), np.uint8)}
+
+
+
+
+class PacmanEnv:
+    def __init__(self, frames_per_step=1, observation=None, observation_type="vector"):
+        # frames_per_step > 1 holds each action for that many frames (fewer, if the episode ends first).
+        # observation, if given, is the array to write observations into (the shape and dtype in OBSERVATION_TYPES);
+        # otherwise the env has one of its own.  Either way, every reset() and step() overwrites and returns the
+        # same array
+        self.sim = Simulation()
+        self.frames_per_step = frames_per_step
+        self.observation_type = observation_type
+        self.observation_shape, self.observation_dtype = OBSERVATION_TYPES[observation_type]
+        if observation is None:
+            observation = np.zeros(self.observation_shape, dtype=self.observation_dtype)
+        self.observation = observation
+
+        self._tile_observation = None
+        if observation_type == "tiles":
+            self._tile_observation = TileObservation(self.sim.maze.grid)
+
+    def reset(self):
+        sim = self.sim
+        sim.reset()
+        while sim.state != "play":
+            sim.step()
+
+        self._observe()
+        return self.observation
+
+    def step(self, action):
+        # A frame at a time, so the episode ends on the frame that does it.  Pacman is caught as soon as a ghost is on
+        # his tile, rather than on the frame after, when the Simulation gets round to it
+        sim = self.sim
+        direction = ACTIONS[action]
+        reward = 0.0
+        done = False
+        for _ in range(self.frames_per_step):
+            sim.step(direction)
+            reward += len(sim.eaten) * PELLET_REWARD
+            if sim.collided or (sim.state == "play" and sim.pacman_caught()):
+                reward += DEATH_REWARD
+                done = True
+                break
+            if sim.maze.grid.cells.count(TILE_PELLET) == 0:
+                done = True
+                break
+
+        self._observe()
+        return self.observation, reward, done, {"frame": sim.frame}
+
+    def _observe(self):
+        observation = self.observation
+        if self._tile_observation is not None:
+            self._tile_observation.build(self.sim, observation)
+            return
+
+        i = 0
+        for actor in self.sim.actors:
+            observation[i] = actor.fx // SUBPIXELS
+            observation[i + 1] = actor.fy // SUBPIXELS
+            observation[i + 2] = HEADING_NUMBERS[actor.heading]
+            i += 3
+        for ghost in self.sim.ghosts:
+            observation[i] = MODE_NUMBERS[ghost.mode]
+            i += 1
+
+
+
+
+#  #####################################################################################################################
+#  Many PacmanEnvs, spread over a pool of processes.
+#
+#  The envs are split into one contiguous run per worker.  step() sends each worker its share of the actions, and
+#  all the workers step at once.  Envs that finish an episode are reset straight away, so the observation that comes
+#  back for them is the first of their next episode.
+#  #####################################################################################################################
+class PacmanVectorEnv:
+    def __init__(self, num_envs, num_workers=None, frames_per_step=1, observation_type="vector"):
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        num_workers = max(1, min(num_workers, num_envs))
+
+        self.num_envs = num_envs
+        self.closed = False
+
+        context = multiprocessing.get_context()
+        shape, dtype = OBSERVATION_TYPES[observation_type]
+        self._shared_observations = context.RawArray(np.ctypeslib.as_ctypes_type(dtype), num_envs * int(np.prod(shape)))
+        self.observations = np.frombuffer(self._shared_observations, dtype=dtype).reshape((num_envs,) + shape)
+
+        self._slices = []
+        self._connections = []
+        self._processes = []
+        for w in range(num_workers):
+            start = num_envs * w // num_workers
+            stop = num_envs * (w + 1) // num_workers
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=_worker,
+                                      args=(child_connection, self._shared_observations, num_envs, start, stop, frames_per_step,
+                                            observation_type),
+                                      daemon=True)
+            process.start()
+            child_connection.close()
+
+            self._slices.append(slice(start, stop))
+            self._connections.append(parent_connection)
+            self._processes.append(process)
+
+    def reset(self):
+        # returns the (num_envs, ...) shared observation array, which the next reset() or step() overwrites
+        for connection in self._connections:
+            connection.send(("reset", None))
+        for connection in self._connections:
+            connection.recv()
+        return self.observations
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for connection, s in zip(self._connections, self._slices):
+            connection.send(("step", actions[s].tolist()))
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        infos = []
+        for connection, s in zip(self._connections, self._slices):
+            rewards[s], dones[s], worker_infos = connection.recv()
+            infos.extend(worker_infos)
+
+        return self.observations, rewards, dones, infos
+
+    def close(self):
+        if self.closed:
+            return
+        for connection in self._connections:
+            try:
+                connection.send(("close", None))
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self._processes:
+            process.join()
+        self.closed = True
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
+
+
+
+
+def _worker(connection, shared_observations, num_envs, start, stop, frames_per_step, observation_type):
+    shape, dtype = OBSERVATION_TYPES[observation_type]
+    observations = np.frombuffer(shared_observations, dtype=dtype).reshape((num_envs,) + shape)
+    envs = [PacmanEnv(frames_per_step, observations[i], observation_type) for i in range(start, stop)]
+
+    while True:
+        command, data = connection.recv()
+        if command == "step":
+            rewards = []
+            dones = []
+            infos = []
+            for env, action in zip(envs, data):
+                observation, reward, done, info = env.step(action)
+                if done:
+                    env.reset()
+                rewards.append(reward)
+                dones.append(done)
+                infos.append(info)
+            connection.send((rewards, dones, infos))
+        elif command == "reset":
+            for env in envs:
+                env.reset()
+            connection.send(None)
+        elif command == "close":
+            connection.close()
+            break
@@ -0,0 +1,23 @@
+#  Settings for the game rules.  Nothing in here may need pygame: the simulation imports this directly so that it
+#  can run headless.  settings.py pulls all of it in for the rest of the game.
+
+
+FRAME_RATE = 60 # frames per second
+
+PACMAN_STARTING_SPEED = 50 # pixels per second
+GHOST_STARTING_SPEED = 46.875
+
+PACMAN_STARTING_POSITION = (15 * 8, 22 * 8 + 4)
+GHOST_STARTING_POSITION = (15 * 8, 10 * 8 + 4)
+
+INTRO_TIME = 4220  # ms, the length of the intro tune
+DIE_TIME = 2650    # ms, from pacman getting caught to the next intro
+
+# (ms into the "play" state, ghost mode to switch to)
+CHASE_SCATTER_SCHEDULE = ((7000,  "chase"),    # scatter for  7 seconds, then chase
+                          (27000, "scatter"),  # chase for 20 seconds, then scatter
+                          (34000, "chase"),    # scatter for  7 seconds, then chase
+                          (54000, "scatter"),  # chase for 20 seconds, then scatter
+                          (59000, "chase"),    # scatter for  5 seconds, then chase
+                          (79000, "scatter"),  # chase for 20 seconds, then scatter
+                          (84000, "chase"))    # scatter for  5 seconds, then chase
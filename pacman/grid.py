@@ -0,0 +1,175 @@
+import operator
+
+
+#  #####################################################################################################################
+#  The maze as plain data.
+#
+#  MazeTile sprites are only used for drawing.  Every movement, pellet and steering query in the game goes through
+#  a MazeGrid instead, which keeps one byte per tile in a flat bytearray:
+#
+#      bits 0..3   tile kind (TILE_NONE, TILE_PELLET, TILE_POWERPELLET, TILE_WALL)
+#      bits 4..7   flags (TILE_FLAG_EATEN, ...)
+#
+#  Tile (r, c) lives at cells[r * num_columns + c].  Columns wrap around, so the tunnel on row 14 is just a
+#  neighbouring cell.
+#  #####################################################################################################################
+
+
+#  tile kinds
+TILE_NONE = 0
+TILE_PELLET = 1
+TILE_POWERPELLET = 2
+TILE_WALL = 3
+
+TILE_KIND_MASK = 0x0F
+
+#  flags
+TILE_FLAG_EATEN = 0x10  # set on a pellet/powerpellet tile once pacman has eaten it
+
+#  the names MazeTile.tile_type uses for each kind
+TILE_TYPE_NAMES = ("none", "pellet", "powerpellet", "wall")
+
+#  bytes.translate() table: a cell -> b"1" if its eaten flag is set, else b"0"
+_EATEN_DIGITS = bytes(ord("1") if cell & TILE_FLAG_EATEN else ord("0") for cell in range(256))
+
+#  (row, column) step to the neighbouring tile for each heading
+HEADING_OFFSETS = {"up": (-1, 0), "down": (1, 0), "left": (0, -1), "right": (0, 1)}
+
+#  exit bits, as stored in MazeGrid.exits
+EXIT_UP = 1
+EXIT_LEFT = 2
+EXIT_DOWN = 4
+EXIT_RIGHT = 8
+
+#  the exits in the order a ghost considers them.  On a tie, the first one wins
+EXIT_ORDER = (("up",    EXIT_UP,    -1,  0),
+              ("left",  EXIT_LEFT,   0, -1),
+              ("down",  EXIT_DOWN,   1,  0),
+              ("right", EXIT_RIGHT,  0,  1))
+
+#  ghosts can't turn around, so the exit back the way they came is never an option
+REVERSE_EXITS = {"up": EXIT_DOWN, "down": EXIT_UP, "left": EXIT_RIGHT, "right": EXIT_LEFT, "": 0}
+
+#  special case tiles (r, c) a ghost may not leave by going up, or down
+NO_UP_TILES = ((11, 14), (11, 17), (23, 14), (23, 17))
+NO_DOWN_TILES = ((11, 15), (11, 16))
+
+
+MAZE_MAP = [ [  3,  3,  1, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 43,   42, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10,  0,  3,  3],
+             [  3,  3,  3, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 25,   24, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45,  2,  3,  3],
+             [  3,  3,  3, 45, 23, 14, 14, 22, 45, 23, 14, 14, 14, 22, 45, 25,   24, 45, 23, 14, 14, 14, 22, 45, 23, 14, 14, 22, 45,  2,  3,  3],
+             [  3,  3,  3, 47, 25, 44, 44, 24, 45, 25, 44, 44, 44, 24, 45, 25,   24, 45, 25, 44, 44, 44, 24, 45, 25, 44, 44, 24, 47,  2,  3,  3],
+             [  3,  3,  3, 45, 27, 20, 20, 26, 45, 27, 20, 20, 20, 26, 45, 27,   26, 45, 27, 20, 20, 20, 26, 45, 27, 20, 20, 26, 45,  2,  3,  3],
+             [  3,  3,  3, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45,   45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45,  2,  3,  3],
+             [  3,  3,  3, 45, 23, 14, 14, 22, 45, 23, 22, 45, 23, 14, 14, 14,   14, 14, 14, 22, 45, 23, 22, 45, 23, 14, 14, 22, 45,  2,  3,  3],
+             [  3,  3,  3, 45, 27, 20, 20, 26, 45, 25, 24, 45, 27, 20, 20, 35,   34, 20, 20, 26, 45, 25, 24, 45, 27, 20, 20, 26, 45,  2,  3,  3],
+             [  3,  3,  3, 45, 45, 45, 45, 45, 45, 25, 24, 45, 45, 45, 45, 25,   24, 45, 45, 45, 45, 25, 24, 45, 45, 45, 45, 45, 45,  2,  3,  3],
+             [  3,  3,  5, 12, 12, 12, 12, 22, 45, 25, 27, 14, 14, 22, 44, 25,   24, 44, 23, 14, 14, 26, 24, 45, 23, 12, 12, 12, 12,  4,  3,  3],
+             [  3,  3, 44, 44, 44, 44, 44,  3, 45, 25, 34, 20, 20, 26, 44, 27,   26, 44, 27, 20, 20, 35, 24, 45,  2, 44, 44, 44, 44, 44,  3,  3],
+             [  3,  3, 44, 44, 44, 44, 44,  3, 45, 25, 24, 44, 44, 44, 44, 44,   44, 44, 44, 44, 44, 25, 24, 45,  2, 44, 44, 44, 44, 44,  3,  3],
+             [  3,  3, 44, 44, 44, 44, 44,  3, 45, 25, 24, 44, 29, 12, 33, 44,   44, 32, 12, 28, 44, 25, 24, 45,  2, 44, 44, 44, 44, 44,  3,  3],
+             [  3,  3, 10, 10, 10, 10, 10, 26, 45, 27, 26, 44,  2, 44, 44, 44,   44, 44, 44,  3, 44, 27, 26, 45, 27, 10, 10, 10, 10, 10,  3,  3],
+             [ 44, 44, 44, 44, 44, 44, 44, 44, 45, 44, 44, 44,  2, 44, 44, 44,   44, 44, 44,  3, 44, 44, 44, 45, 44, 44, 44, 44, 44, 44, 44, 44],
+             [  3,  3, 12, 12, 12, 12, 12, 22, 45, 23, 22, 44,  2, 44, 44, 44,   44, 44, 44,  3, 44, 23, 22, 45, 23, 12, 12, 12, 12, 12,  3,  3],
+             [  3,  3, 44, 44, 44, 44, 44,  3, 45, 25, 24, 44, 31, 10, 10, 10,   10, 10, 10, 30, 44, 25, 24, 45,  2, 44, 44, 44, 44, 44,  3,  3],
+             [  3,  3, 44, 44, 44, 44, 44,  3, 45, 25, 24, 44, 44, 44, 44, 44,   44, 44, 44, 44, 44, 25, 24, 45,  2, 44, 44, 44, 44, 44,  3,  3],
+             [  3,  3, 44, 44, 44, 44, 44,  3, 45, 25, 24, 44, 23, 14, 14, 14,   14, 14, 14, 22, 44, 25, 24, 45,  2, 44, 44, 44, 44, 44,  3,  3],
+             [  3,  3,  1, 10, 10, 10, 10, 26, 45, 27, 26, 44, 27, 20, 20, 35,   34, 20, 20, 26, 44, 27, 26, 45, 27, 10, 10, 10, 10,  0,  3,  3],
+             [  3,  3,  3, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 25,   24, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45,  2,  3,  3],
+             [  3,  3,  3, 45, 23, 14, 14, 22, 45, 23, 14, 14, 14, 22, 45, 25,   24, 45, 23, 14, 14, 14, 22, 45, 23, 14, 14, 22, 45,  2,  3,  3],
+             [  3,  3,  3, 45, 27, 21, 35, 24, 45, 27, 20, 20, 20, 26, 45, 27,   26, 45, 27, 20, 20, 20, 26, 45, 25, 34, 20, 26, 45,  2,  3,  3],
+             [  3,  3,  3, 47, 45, 45, 25, 24, 45, 45, 45, 45, 45, 45, 45, 44,   44, 45, 45, 45, 45, 45, 45, 45, 25, 24, 45, 45, 47,  2,  3,  3],
+             [  3,  3,  7, 14, 22, 45, 25, 24, 45, 23, 22, 45, 23, 14, 14, 14,   14, 14, 14, 22, 45, 23, 22, 45, 25, 24, 45, 23, 14,  6,  3,  3],
+             [  3,  3,  9, 20, 26, 45, 27, 26, 45, 25, 24, 45, 27, 20, 20, 35,   34, 20, 20, 40, 45, 25, 24, 45, 27, 26, 45, 27, 20,  8,  3,  3],
+             [  3,  3,  3, 45, 45, 45, 45, 45, 45, 25, 24, 45, 45, 45, 45, 25,   24, 45, 45, 45, 45, 25, 24, 45, 45, 45, 45, 45, 45,  2,  3,  3],
+             [  3,  3,  3, 45, 23, 14, 14, 14, 14, 37, 36, 14, 14, 22, 45, 25,   24, 45, 23, 14, 14, 37, 36, 14, 14, 14, 14, 38, 45,  2,  3,  3],
+             [  3,  3,  3, 45, 27, 20, 20, 20, 20, 20, 20, 20, 20, 26, 45, 27,   26, 45, 27, 20, 20, 20, 20, 20, 20, 20, 20, 26, 45,  2,  3,  3],
+             [  3,  3,  3, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45,   45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45, 45,  2,  3,  3],
+             [  3,  3,  5, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12,   12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12,  4,  3,  3]
+           ]
+
+
+
+
+def tile_kind_from_number(tile_type_number):
+    if tile_type_number == 45:
+        return TILE_PELLET
+    elif tile_type_number == 47:
+        return TILE_POWERPELLET
+    elif tile_type_number == 44:
+        return TILE_NONE
+    else:
+        return TILE_WALL
+
+
+
+
+class MazeGrid:
+    def __init__(self, tile_map):
+        self.num_rows = len(tile_map)
+        self.num_columns = len(tile_map[0])
+
+        self.cells = bytearray(tile_kind_from_number(n) for row in tile_map for n in row)
+        self._fresh_cells = bytes(self.cells)  # a copy of the level as it starts, with every pellet in place
+
+        self.exits = bytearray(len(self.cells))  # per tile: EXIT_* bits for each way a ghost can leave it
+        self._compile_exits()
+
+        # the cells that start with a pellet or powerpellet, in order: bit i of eaten_bits() is pellet_cells[i]
+        self.pellet_cells = tuple(i for i, cell in enumerate(self.cells) if cell in (TILE_PELLET, TILE_POWERPELLET))
+        self._pellet_bytes = (len(self.pellet_cells) + 7) // 8
+        self._get_pellet_cells = operator.itemgetter(*self.pellet_cells)
+
+    def reset_pellets(self):
+        self.cells[:] = self._fresh_cells
+
+    def _compile_exits(self):
+        for r in range(self.num_rows):
+            for c in range(self.num_columns):
+                if self.is_wall(r, c):
+                    continue
+                exits = 0
+                for heading, exit_bit, dr, dc in EXIT_ORDER:
+                    if 0 <= r + dr < self.num_rows and not self.is_wall(r + dr, c + dc):
+                        exits |= exit_bit
+                if (r, c) in NO_UP_TILES:
+                    exits &= ~EXIT_UP
+                if (r, c) in NO_DOWN_TILES:
+                    exits &= ~EXIT_DOWN
+                self.exits[r * self.num_columns + c] = exits
+
+    #  --- addressing --------------------------------------------------------------------------------------------------
+    def index(self, r, c):
+        return r * self.num_columns + c % self.num_columns
+
+    def address_from_screen(self, position):
+        return int(position[1] / 8), int(position[0] / 8)
+
+    #  --- queries -----------------------------------------------------------------------------------------------------
+    def is_wall(self, r, c):
+        return self.cells[r * self.num_columns + c % self.num_columns] == TILE_WALL
+
+    def has_pellet(self, r, c):
+        return self.cells[r * self.num_columns + c % self.num_columns] == TILE_PELLET
+
+    def pellets_remaining(self):
+        return self.cells.count(TILE_PELLET) + self.cells.count(TILE_POWERPELLET)
+
+    #  --- changes -----------------------------------------------------------------------------------------------------
+    def eat(self, r, c):
+        self.cells[r * self.num_columns + c % self.num_columns] |= TILE_FLAG_EATEN
+
+    #  --- packing -----------------------------------------------------------------------------------------------------
+    def eaten_bits(self):
+        # which pellets have been eaten, as a little-endian bitset over pellet_cells
+        digits = bytes(self._get_pellet_cells(self.cells)).translate(_EATEN_DIGITS)
+        return int(digits[::-1], 2).to_bytes(self._pellet_bytes, "little")
+
+    def set_eaten_bits(self, data):
+        self.cells[:] = self._fresh_cells
+        bits = int.from_bytes(data, "little")
+        pellet_cells = self.pellet_cells
+        while bits:
+            lowest = bits & -bits
+            self.cells[pellet_cells[lowest.bit_length() - 1]] |= TILE_FLAG_EATEN
+            bits ^= lowest
@@ -0,0 +1,73 @@
+import threading
+import queue
+
+
+#  #####################################################################################################################
+#  Loading assets in the background.
+#
+#  Each job is a pair of functions.  decode() runs on the loader's worker thread and does the slow part: reading and
+#  decoding the file.  finish() is handed its result back on the main thread, in poll(), for anything that has to
+#  happen there (convert_alpha() needs the display) and to put it wherever it's kept.  The App runs a loader behind
+#  the start screen, polling it every frame, so the game is ready before the player is.
+#  #####################################################################################################################
+
+
+
+
+class AssetLoader:
+    def __init__(self):
+        self._jobs = []                # (decode, finish, args), until start()
+        self._decoded = queue.Queue()  # (finish, result) from the worker, waiting for poll()
+        self._thread = None
+        self._error = None             # the exception that stopped the worker, raised again by poll()
+        self.num_jobs = 0
+        self.num_finished = 0
+
+    def add(self, decode, finish, *args):
+        # decode(*args) on the worker thread, then finish(result) on the main thread
+        self._jobs.append((decode, finish, args))
+        self.num_jobs += 1
+
+    @property
+    def progress(self):
+        # 0 to 1, how much has been loaded and handed over
+        if self.num_jobs == 0:
+            return 1.0
+        return self.num_finished / self.num_jobs
+
+    @property
+    def done(self):
+        return self.num_finished == self.num_jobs
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="AssetLoader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            for decode, finish, args in self._jobs:
+                self._decoded.put((finish, decode(*args)))
+        except Exception as e:
+            self._error = e
+            self._decoded.put(None)
+
+    def poll(self):
+        # on the main thread: hand over everything decoded so far
+        while True:
+            try:
+                item = self._decoded.get_nowait()
+            except queue.Empty:
+                return
+
+            if item is None:
+                raise self._error
+
+            finish, result = item
+            finish(result)
+            self.num_finished += 1
+
+    def finish(self):
+        # on the main thread: wait for the rest, and hand it all over
+        if self._thread is not None:
+            self._thread.join()
+        self.poll()
@@ -0,0 +1,91 @@
+import numpy as np
+from pacman.grid import *
+from pacman.batch import PACMAN
+from pacman.batch import NUM_ACTORS
+from pacman.batch import MODE_NAMES
+
+
+#  #####################################################################################################################
+#  What an agent sees: the maze as a stack of tile-sized uint8 planes, built straight from the game state.
+#
+#      CHANNEL_WALLS          1 on wall tiles
+#      CHANNEL_PELLETS        1 on tiles with a pellet still there
+#      CHANNEL_POWERPELLETS   1 on tiles with a power pellet still there
+#      CHANNEL_PACMAN         1 on pacman's tile
+#      CHANNEL_BLINKY ..      one plane per ghost, marking its tile with GHOST_VALUES[its mode]
+#      CHANNEL_CLYDE
+#
+#  An observation is (NUM_CHANNELS, rows, columns), or (games, NUM_CHANNELS, rows, columns) for a BatchSimulation.
+#  Nothing is rendered: each build is a handful of array writes into a buffer the caller keeps and reuses.
+#  #####################################################################################################################
+
+CHANNEL_WALLS = 0
+CHANNEL_PELLETS = 1
+CHANNEL_POWERPELLETS = 2
+CHANNEL_PACMAN = 3
+CHANNEL_BLINKY = 4
+CHANNEL_PINKY = 5
+CHANNEL_INKY = 6
+CHANNEL_CLYDE = 7
+NUM_CHANNELS = 8
+
+GHOST_VALUES = {"chase": 1, "scatter": 2}
+_BATCH_GHOST_VALUES = np.array([GHOST_VALUES[mode] for mode in MODE_NAMES], dtype=np.uint8)
+
+
+
+
+class TileObservation:
+    def __init__(self, grid):
+        self.shape = (NUM_CHANNELS, grid.num_rows, grid.num_columns)
+
+        cells = np.frombuffer(bytes(grid.cells), dtype=np.uint8).reshape(grid.num_rows, grid.num_columns)
+        self._walls = (cells == TILE_WALL).astype(np.uint8)
+        self._fresh_powerpellets = (cells == TILE_POWERPELLET).astype(np.uint8)
+
+    def new_buffer(self, num_games=None):
+        if num_games is None:
+            return np.zeros(self.shape, dtype=np.uint8)
+        return np.zeros((num_games,) + self.shape, dtype=np.uint8)
+
+    def build(self, sim, out=None):
+        # fill out (or a new buffer) with the observation of a Simulation, and return it
+        if out is None:
+            out = self.new_buffer()
+
+        grid = sim.maze.grid
+        cells = np.frombuffer(grid.cells, dtype=np.uint8).reshape(grid.num_rows, grid.num_columns)
+        out[CHANNEL_WALLS] = self._walls
+        np.equal(cells, TILE_PELLET, out=out[CHANNEL_PELLETS], casting="unsafe")
+        np.equal(cells, TILE_POWERPELLET, out=out[CHANNEL_POWERPELLETS], casting="unsafe")
+
+        out[CHANNEL_PACMAN:] = 0
+        r, c = sim.pacman.current_tile_address()
+        out[CHANNEL_PACMAN, r, c] = 1
+        for channel, ghost in enumerate(sim.ghosts, CHANNEL_BLINKY):
+            r, c = ghost.current_tile_address()
+            out[channel, r, c] = GHOST_VALUES.get(ghost.mode, 1)
+
+        return out
+
+    def build_batch(self, batch, out=None):
+        # the same for every game of a BatchSimulation at once, into a (games, NUM_CHANNELS, rows, columns) buffer
+        if out is None:
+            out = self.new_buffer(batch.num_games)
+
+        num_games, channels, num_rows, num_columns = out.shape
+        out[:, CHANNEL_WALLS] = self._walls
+        pellets = np.unpackbits(batch.pellets, axis=1, count=num_rows * num_columns, bitorder="little")
+        out[:, CHANNEL_PELLETS] = pellets.reshape(num_games, num_rows, num_columns)
+        out[:, CHANNEL_POWERPELLETS] = self._fresh_powerpellets  # never eaten
+
+        out[:, CHANNEL_PACMAN:] = 0
+        games = np.arange(num_games)
+        for a in range(NUM_ACTORS):
+            r, c = batch.tile_address(a)
+            if a == PACMAN:
+                out[games, CHANNEL_PACMAN, r, c] = 1
+            else:
+                out[games, CHANNEL_BLINKY + a - 1, r, c] = _BATCH_GHOST_VALUES[batch.mode[:, a]]
+
+        return out
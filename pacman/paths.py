@@ -0,0 +1,208 @@
+import hashlib
+from array import array
+from collections import deque
+from pacman.grid import *
+
+
+#  #####################################################################################################################
+#  All-pairs shortest paths over the walkable tiles of a MazeGrid.
+#
+#  Every non-wall tile is a node.  Two nodes are joined when they are neighbours on the grid (columns wrap, so the
+#  tunnel on row 14 is an ordinary edge).  For every (from, to) pair of nodes we keep:
+#
+#      distances[from * node_count + to]   number of tile steps, or UNREACHABLE
+#      next_hops[from * node_count + to]   index into EXIT_ORDER of the first step to take, or NO_HOP
+#
+#  Building the tables is one BFS per node, a fraction of a second.  The result only depends on where the walls are,
+#  so get_maze_paths() builds it once per wall layout and shares it between every maze (every Simulation) in the
+#  process that has those walls.
+#  #####################################################################################################################
+
+UNREACHABLE = 0xFFFF
+NO_HOP = 0xFF
+
+_maze_paths = {}  # hash of the wall layout -> MazePaths
+
+
+def get_maze_paths(grid):
+    map_hash = MazePaths.hash_walls(grid)
+    paths = _maze_paths.get(map_hash)
+    if paths is None:
+        paths = _maze_paths[map_hash] = MazePaths(grid)
+    return paths
+
+
+
+
+class MazePaths:
+    def __init__(self, grid):
+        # grid: any MazeGrid with these walls (only the walls are looked at, so the tables fit them all)
+        self._num_columns = grid.num_columns
+
+        # node numbering: walkable cells in row-major order
+        self.node_cells = array("H", (i for i, cell in enumerate(grid.cells) if cell & TILE_KIND_MASK != TILE_WALL))
+        self.node_count = len(self.node_cells)
+        self.node_of_cell = array("h", [-1]) * len(grid.cells)
+        for node, i in enumerate(self.node_cells):
+            self.node_of_cell[i] = node
+
+        self.map_hash = self.hash_walls(grid)
+        self.distances = None
+        self.next_hops = None
+        self._compile(grid)
+
+    #  --- queries -----------------------------------------------------------------------------------------------------
+    def node(self, r, c):
+        return self.node_of_cell[r * self._num_columns + c % self._num_columns]
+
+    def distance(self, from_rc, to_rc):
+        # returns the number of tile steps between two tiles, or None if either is a wall or there's no way through
+        a = self.node(from_rc[0], from_rc[1])
+        b = self.node(to_rc[0], to_rc[1])
+        if a < 0 or b < 0:
+            return None
+        d = self.distances[a * self.node_count + b]
+        if d == UNREACHABLE:
+            return None
+        return d
+
+    def next_heading(self, from_rc, to_rc):
+        # returns the heading of the first step along a shortest path, or "" if there isn't one (or we're there)
+        a = self.node(from_rc[0], from_rc[1])
+        b = self.node(to_rc[0], to_rc[1])
+        if a < 0 or b < 0:
+            return ""
+        hop = self.next_hops[a * self.node_count + b]
+        if hop == NO_HOP:
+            return ""
+        return EXIT_ORDER[hop][0]
+
+    def path(self, from_rc, to_rc):
+        # returns the list of (r, c) tiles from from_rc to to_rc (both included), or [] if there's no way through
+        if self.distance(from_rc, to_rc) is None:
+            return []
+
+        num_columns = self._num_columns
+        b = self.node(to_rc[0], to_rc[1])
+        r, c = from_rc[0], from_rc[1] % num_columns
+        tiles = [(r, c)]
+        a = self.node(r, c)
+        while a != b:
+            heading, exit_bit, dr, dc = EXIT_ORDER[self.next_hops[a * self.node_count + b]]
+            r, c = r + dr, (c + dc) % num_columns
+            tiles.append((r, c))
+            a = self.node(r, c)
+
+        return tiles
+
+    #  --- building ----------------------------------------------------------------------------------------------------
+    @staticmethod
+    def hash_walls(grid):
+        h = hashlib.sha1()
+        h.update("{0}x{1}:".format(grid.num_rows, grid.num_columns).encode("ascii"))
+        h.update(bytes(1 if cell & TILE_KIND_MASK == TILE_WALL else 0 for cell in grid.cells))
+        return h.hexdigest()[:16]
+
+    def _compile(self, grid):
+        num_rows = grid.num_rows
+        num_columns = self._num_columns
+        n = self.node_count
+        node_of_cell = self.node_of_cell
+
+        # neighbours[node] = [(neighbour node, EXIT_ORDER index of the step from node to neighbour), ...]
+        neighbours = []
+        for i in self.node_cells:
+            r, c = divmod(i, num_columns)
+            node_neighbours = []
+            for hop, (heading, exit_bit, dr, dc) in enumerate(EXIT_ORDER):
+                if 0 <= r + dr < num_rows:
+                    other = node_of_cell[(r + dr) * num_columns + (c + dc) % num_columns]
+                    if other >= 0:
+                        node_neighbours.append((other, hop))
+            neighbours.append(node_neighbours)
+
+        # the step back along an edge: up <-> down, left <-> right
+        reverse_hop = (2, 3, 0, 1)
+
+        distances = array("H", [UNREACHABLE]) * (n * n)
+        next_hops = bytearray([NO_HOP]) * (n * n)
+
+        # one BFS out from each target.  Whenever it reaches a node, the step back towards the node it came from is
+        # the first step of a shortest path from that node to the target
+        for target in range(n):
+            distances[target * n + target] = 0
+            queue = deque((target,))
+            while queue:
+                u = queue.popleft()
+                d = distances[u * n + target] + 1
+                for v, hop in neighbours[u]:
+                    k = v * n + target
+                    if distances[k] == UNREACHABLE:
+                        distances[k] = d
+                        next_hops[k] = reverse_hop[hop]
+                        queue.append(v)
+
+        self.distances = distances
+        self.next_hops = next_hops
+
+
+
+
+#  #####################################################################################################################
+#  A flow field towards one target tile (normally pacman's), shared by every actor in the maze.
+#
+#  With the all-pairs table in hand, the distance field towards a tile is simply that tile's column of
+#  MazePaths.distances.  Moving the target (pacman stepping into the next tile) just selects a different column, so
+#  the field is "recomputed" once per target tile change for every ghost at once, at no per-ghost cost.
+#  #####################################################################################################################
+class FlowField:
+    def __init__(self, paths):
+        self._paths = paths
+        self._num_columns = paths._num_columns
+        self.target_r = -1
+        self.target_c = -1
+        self.target_node = -1
+        self.version = 0  # bumped whenever the target changes, for anyone caching what they read
+
+    def set_target(self, r, c):
+        c %= self._num_columns
+        if r != self.target_r or c != self.target_c:
+            self.target_r = r
+            self.target_c = c
+            self.target_node = self._paths.node(r, c)
+            self.version += 1
+
+    def target_center(self):
+        return self.target_c * 8 + 4, self.target_r * 8 + 4
+
+    def distance(self, r, c):
+        # tile steps from (r, c) to the target, or UNREACHABLE
+        node = self._paths.node(r, c)
+        if node < 0 or self.target_node < 0:
+            return UNREACHABLE
+        return self._paths.distances[node * self._paths.node_count + self.target_node]
+
+    def heading_from(self, r, c, exits):
+        # of the headings allowed by the EXIT_* bits in exits, return the one leading downhill towards the target,
+        # or "" if none of them gets there.  Ties go to the first in EXIT_ORDER, as with ghost steering
+        target = self.target_node
+        if target < 0:
+            return ""
+
+        paths = self._paths
+        distances = paths.distances
+        node_of_cell = paths.node_of_cell
+        n = paths.node_count
+        num_columns = self._num_columns
+
+        best_heading = ""
+        best_distance = UNREACHABLE
+        for heading, exit_bit, dr, dc in EXIT_ORDER:
+            if exits & exit_bit:
+                node = node_of_cell[(r + dr) * num_columns + (c + dc) % num_columns]
+                d = distances[node * n + target]
+                if d < best_distance:
+                    best_distance = d
+                    best_heading = heading
+
+        return best_heading
@@ -0,0 +1,258 @@
+import pygame
+import weakref
+from pacman.settings import *
+
+
+#  #####################################################################################################################
+#  Getting the game onto the display, a few rectangles at a time.
+#
+#  The game is drawn at GAME_RESOLUTION on game_screen, which is kept from frame to frame.  The maze itself, walls and
+#  pellets together, is baked once into maze_layer, and an eaten pellet is patched out of it a tile at a time.
+#  Everything that changes (the actors, text, eaten pellets) is drawn through the Renderer, which remembers the
+#  rectangles it touched:
+#
+#      begin_frame()   puts the maze back under whatever was drawn over it last frame
+#      draw...()       draws this frame's overlays, and marks where
+#      present()       scales just the dirty rectangles up onto the display and updates only those
+#
+#  A resize (or the very first frame) sends the whole picture.
+#
+#  The picture is scaled into an output surface made once per window size, by a whole number k, so every game pixel
+#  becomes an exact k x k block and a dirty rectangle maps straight across with no rounding.  A window that's a whole
+#  multiple of CROP_RESOLUTION is filled; any other size gets the largest whole multiple that fits, letterboxed in
+#  black, rather than a stretched picture.  Only a window too small for k = 1 gets a fractional scale, and that's
+#  sent whole every frame (scaling rectangles separately by a fraction leaves seams).
+#
+#  ScaledRenderer skips game_screen altogether: see below.
+#  #####################################################################################################################
+
+CROP_X = (GAME_RESOLUTION.width - CROP_RESOLUTION.width) // 2  # game_screen x that shows at the display's left edge
+
+
+
+
+class Renderer:
+    def __init__(self, display_screen, background, maze):
+        # background: the walls, as a GAME_RESOLUTION surface
+        # maze: the Maze, for its pellets
+        self.game_screen = pygame.Surface(GAME_RESOLUTION.size)
+        self.background = background
+        self.maze = maze
+        self.maze_layer = pygame.Surface(GAME_RESOLUTION.size)
+
+        self._overlays = []  # the rectangles drawn over the maze last frame
+        self._dirty = []     # the rectangles of game_screen that have changed since the last present()
+        self._full_update = True
+
+        self.bake_pellets()
+        self.resize(display_screen)
+
+    def resize(self, display_screen):
+        self.display_screen = display_screen
+        dw, dh = display_screen.get_size()
+        cw, ch = CROP_RESOLUTION.size
+
+        self.integer_scale = min(dw // cw, dh // ch)
+        if self.integer_scale > 0:
+            width, height = cw * self.integer_scale, ch * self.integer_scale
+        elif dw * ch < dh * cw:
+            width, height = dw, ch * dw // cw
+        else:
+            width, height = cw * dh // ch, dh
+
+        # where the picture goes on the display, and the surface it's scaled into
+        self.output_rect = pygame.Rect((dw - width) // 2, (dh - height) // 2, max(width, 1), max(height, 1))
+        self._output = pygame.Surface(self.output_rect.size, 0, self.game_screen)
+        self._full_update = True
+
+    def bake_pellets(self):
+        # Draw the walls and every pellet still in the maze into maze_layer, and start game_screen over from it.
+        # Once per level: after this, pellets are only ever rubbed out
+        self.maze_layer.blit(self.background, (0, 0))
+        self.maze.pellets.draw(self.maze_layer)
+        self.maze.powerpellets.draw(self.maze_layer)
+
+        self.game_screen.blit(self.maze_layer, (0, 0))
+        self._overlays = []
+        self._dirty = []
+        self._full_update = True
+
+    #  --- drawing -----------------------------------------------------------------------------------------------------
+    def begin_frame(self):
+        # rub out last frame's overlays
+        for rect in self._overlays:
+            self._restore(rect)
+        self._dirty.extend(self._overlays)
+        self._overlays = []
+
+    def draw(self, image, position):
+        rect = self.game_screen.blit(image, position)
+        self._overlays.append(rect)
+        self._dirty.append(rect)
+        return rect
+
+    def draw_group(self, group):
+        for sprite in group:
+            self.draw(sprite.image, sprite.rect)
+
+    def erase_cell(self, r, c):
+        # a pellet's been eaten: patch its tile of maze_layer back to bare background
+        rect = pygame.Rect(c * 8, r * 8, 8, 8)
+        self.maze_layer.blit(self.background, rect, rect)
+        self._restore(rect)
+        self._dirty.append(rect)
+
+    def _restore(self, rect):
+        self.game_screen.blit(self.maze_layer, rect, rect)
+
+    #  --- onto the display --------------------------------------------------------------------------------------------
+    def present(self):
+        display_screen = self.display_screen
+        output = self._output
+        output_rect = self.output_rect
+        crop_area = pygame.Rect(CROP_X, 0, CROP_RESOLUTION.width, CROP_RESOLUTION.height)
+
+        k = self.integer_scale
+        if self._full_update or k == 0:
+            self._full_update = False
+            self._dirty = []
+            pygame.transform.scale(self.game_screen.subsurface(crop_area), output_rect.size, output)
+            display_screen.fill((0, 0, 0))
+            display_screen.blit(output, output_rect)
+            pygame.display.flip()
+            return
+
+        updates = []
+        for rect in self._dirty:
+            rect = rect.clip(crop_area)
+            if rect.width == 0 or rect.height == 0:
+                continue
+
+            # where rect lands in the output
+            target = pygame.Rect((rect.left - CROP_X) * k, rect.top * k, rect.width * k, rect.height * k)
+            pygame.transform.scale(self.game_screen.subsurface(rect), target.size, output.subsurface(target))
+            updates.append(display_screen.blit(output, target.move(output_rect.topleft), target))
+
+        self._dirty = []
+        pygame.display.update(updates)
+
+
+
+
+#  #####################################################################################################################
+#  The same, drawn straight onto the display.
+#
+#  Instead of composing the frame at game size and scaling it up, a ScaledRenderer scales its sources up once: each
+#  spritesheet the sprites are cut from, and the maze layer.  Sprites are then just blitted at k times their game
+#  position, so a frame's pixel work is only the few actor-sized rectangles that changed.  Scaled sheets and
+#  backgrounds are kept per scale, so going back to a window size is free.  Anything that isn't cut from a sheet (text)
+#  is scaled on its own, the first time it's drawn at each size.
+#
+#  With whole-number scaling this comes out pixel for pixel the same as Renderer.  It always draws at k >= 1: a window
+#  too small for that shows the middle of the picture.
+#  #####################################################################################################################
+class ScaledRenderer(Renderer):
+    def __init__(self, display_screen, background, maze):
+        self.scale = 0
+        self._scaled_sheets = {}       # (sheet, scale) -> the sheet scaled up by scale
+        self._scaled_backgrounds = {}  # scale -> the background scaled up by it
+        self._scaled_layer = None      # maze_layer, at the current scale
+        self._scaled_images = weakref.WeakKeyDictionary()  # image -> scaled image, at the current scale
+        super().__init__(display_screen, background, maze)
+
+    def resize(self, display_screen):
+        self.display_screen = display_screen
+        dw, dh = display_screen.get_size()
+        cw, ch = CROP_RESOLUTION.size
+
+        k = max(1, min(dw // cw, dh // ch))
+        self.scale = self.integer_scale = k
+        self.output_rect = pygame.Rect((dw - cw * k) // 2, (dh - ch * k) // 2, cw * k, ch * k)
+        self._scaled_images = weakref.WeakKeyDictionary()
+        self._scale_maze_layer()
+
+        # everything goes on the display from here, so put the whole maze up now, ready for this frame's sprites
+        display_screen.fill((0, 0, 0))
+        self._restore(self.output_rect)
+        self._overlays = []
+        self._full_update = True
+
+    def bake_pellets(self):
+        super().bake_pellets()
+        if self.scale:
+            self._scale_maze_layer()
+            self._restore(self.output_rect)
+
+    def _scale_maze_layer(self):
+        k = self.scale
+        size = (GAME_RESOLUTION.width * k, GAME_RESOLUTION.height * k)
+        if k not in self._scaled_backgrounds:
+            self._scaled_backgrounds[k] = pygame.transform.scale(self.background, size)
+
+        if self._scaled_layer is None or self._scaled_layer.get_size() != size:
+            self._scaled_layer = pygame.Surface(size, 0, self.maze_layer)
+        pygame.transform.scale(self.maze_layer, size, self._scaled_layer)
+
+    def _scaled(self, image):
+        scaled = self._scaled_images.get(image)
+        if scaled is None:
+            k = self.scale
+            w, h = image.get_size()
+            sheet = image.get_abs_parent()
+            if sheet is image:
+                scaled = pygame.transform.scale(image, (w * k, h * k))
+            else:
+                scaled_sheet = self._scaled_sheets.get((sheet, k))
+                if scaled_sheet is None:
+                    scaled_sheet = pygame.transform.scale(sheet, (sheet.get_width() * k, sheet.get_height() * k))
+                    self._scaled_sheets[(sheet, k)] = scaled_sheet
+
+                x, y = image.get_abs_offset()
+                scaled = scaled_sheet.subsurface(pygame.Rect(x * k, y * k, w * k, h * k))
+            self._scaled_images[image] = scaled
+
+        return scaled
+
+    #  --- drawing -----------------------------------------------------------------------------------------------------
+    #  The rectangles here are all on the display, and kept inside output_rect (the display is left unclipped, for
+    #  whatever else draws on it between games)
+    def draw(self, image, position):
+        k = self.scale
+        x = self.output_rect.x + (position[0] - CROP_X) * k
+        y = self.output_rect.y + position[1] * k
+        scaled = self._scaled(image)
+        rect = self.output_rect.clip(pygame.Rect((x, y), scaled.get_size()))
+        self.display_screen.blit(scaled, rect, rect.move(-x, -y))
+        self._overlays.append(rect)
+        self._dirty.append(rect)
+        return rect
+
+    def erase_cell(self, r, c):
+        cell = pygame.Rect(c * 8, r * 8, 8, 8)
+        self.maze_layer.blit(self.background, cell, cell)
+
+        k = self.scale
+        scaled_cell = pygame.Rect(cell.x * k, cell.y * k, 8 * k, 8 * k)
+        self._scaled_layer.blit(self._scaled_backgrounds[k], scaled_cell, scaled_cell)
+
+        rect = scaled_cell.move(self.output_rect.x - CROP_X * k, self.output_rect.y)
+        self._restore(rect)
+        self._dirty.append(rect)
+
+    def _restore(self, rect):
+        if self._scaled_layer is not None:
+            rect = rect.clip(self.output_rect)
+            source = rect.move(CROP_X * self.scale - self.output_rect.x, -self.output_rect.y)
+            self.display_screen.blit(self._scaled_layer, rect, source)
+
+    #  --- onto the display --------------------------------------------------------------------------------------------
+    def present(self):
+        if self._full_update:
+            self._full_update = False
+            self._dirty = []
+            pygame.display.flip()
+            return
+
+        updates = [rect.clip(self.output_rect) for rect in self._dirty]
+        self._dirty = []
+        pygame.display.update(updates)
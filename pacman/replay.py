@@ -0,0 +1,144 @@
+import sys
+import json
+import time
+import zlib
+from array import array
+import pacman.game_settings
+from pacman.game_settings import *
+from pacman.simulation import Simulation
+from pacman.simulation import SUBPIXELS
+
+
+#  #####################################################################################################################
+#  Session recording and replay.
+#
+#  A SessionLog holds everything needed to play a game again exactly: the seed, the game settings it ran under, the
+#  direction pushed on every frame, and a checksum of the Simulation state after every frame.  Feeding the
+#  directions back into a new Simulation must give the same checksums; the first frame that doesn't is where
+#  behaviour changed.
+#
+#  On disk a log is a short header line followed by a zlib-compressed body.  The directions compress to almost
+#  nothing (the player holds one for seconds at a time), but the checksums don't, so a session comes to a little
+#  over 4 bytes a frame: about 250 bytes per second.
+#  #####################################################################################################################
+
+REPLAY_MAGIC = b"pacman-replay v1\n"
+
+DIRECTIONS = ("", "up", "left", "down", "right")  # stored as the index in here, one byte per frame
+
+
+def current_settings():
+    # the settings a Simulation runs by, as plain JSON-able values
+    settings = {name: getattr(pacman.game_settings, name) for name in dir(pacman.game_settings) if name.isupper()}
+    settings["SUBPIXELS"] = SUBPIXELS
+    return json.loads(json.dumps(settings))
+
+
+def state_checksum(sim):
+    return zlib.crc32(sim.snapshot())
+
+
+
+
+class SessionLog:
+    def __init__(self, seed=0, settings=None):
+        self.seed = seed
+        self.settings = current_settings() if settings is None else settings
+        self.directions = bytearray()
+        self.checksums = array("I")
+
+    @property
+    def num_frames(self):
+        return len(self.directions)
+
+    def record(self, direction, sim):
+        # call after each sim.step(direction)
+        self.directions.append(DIRECTIONS.index(direction))
+        self.checksums.append(state_checksum(sim))
+
+    def direction(self, frame):
+        return DIRECTIONS[self.directions[frame]]
+
+    def settings_match(self):
+        return self.settings == current_settings()
+
+    #  --- files -------------------------------------------------------------------------------------------------------
+    def save(self, path):
+        # never over an existing log: FileExistsError instead
+        header = json.dumps({"seed": self.seed, "settings": self.settings, "frames": self.num_frames}).encode("utf-8")
+        checksums = array("I", self.checksums)
+        if sys.byteorder != "little":
+            checksums.byteswap()
+
+        with open(path, "xb") as f:
+            f.write(REPLAY_MAGIC)
+            f.write(zlib.compress(header + b"\n" + bytes(self.directions) + checksums.tobytes(), 9))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            if f.readline() != REPLAY_MAGIC:
+                raise ValueError("{0} is not a pacman replay".format(path))
+            body = zlib.decompress(f.read())
+
+        header, data = body.split(b"\n", 1)
+        header = json.loads(header.decode("utf-8"))
+        frames = header["frames"]
+
+        log = cls(header["seed"], header["settings"])
+        log.directions = bytearray(data[:frames])
+        log.checksums = array("I")
+        log.checksums.frombytes(data[frames:])
+        if sys.byteorder != "little":
+            log.checksums.byteswap()
+        if len(log.checksums) != frames:
+            raise ValueError("{0} is truncated".format(path))
+        return log
+
+
+
+
+def replay(log, realtime=False):
+    # Run a log through a new Simulation with no display, at FRAME_RATE if realtime, otherwise as fast as it goes.
+    # Returns the first frame whose checksum doesn't match the recording, or None if they all do
+    sim = Simulation()
+    frame_time = 1.0 / FRAME_RATE
+    next_time = time.perf_counter()
+
+    for frame in range(log.num_frames):
+        sim.step(log.direction(frame))
+        if state_checksum(sim) != log.checksums[frame]:
+            return frame
+
+        if realtime:
+            next_time += frame_time
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    return None
+
+
+
+
+#  python -m pacman.replay [--realtime] log_file ...
+#  replays each log headless and reports whether it still plays out the same
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    realtime = "--realtime" in args
+    paths = [arg for arg in args if arg != "--realtime"]
+
+    failures = 0
+    started = time.perf_counter()
+    for path in paths:
+        log = SessionLog.load(path)
+        bad_frame = replay(log, realtime)
+        if bad_frame is None:
+            print("ok        {0} ({1} frames)".format(path, log.num_frames))
+        else:
+            failures += 1
+            note = "" if log.settings_match() else ", recorded with different settings"
+            print("DIVERGED  {0} at frame {1} of {2}{3}".format(path, bad_frame, log.num_frames, note))
+
+    print("{0} replays, {1} diverged, {2:.1f}s".format(len(paths), failures, time.perf_counter() - started))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,173 @@
+import pygame
+import os
+from pacman.settings import *
+from pacman.maze import Pacman
+from pacman.maze import Blinky
+from pacman.maze import Pinky
+from pacman.maze import Inky
+from pacman.maze import Clyde
+from pacman.maze import Maze
+from pacman.simulation import Simulation
+from pacman.renderer import Renderer
+from pacman.renderer import ScaledRenderer
+from pacman.spritesheet import add_spritesheet
+from pacman.text import render_text
+from pacman.text import load_font
+from pacman.text import add_font
+from pacman.loader import AssetLoader
+from pacman.Event import *
+
+
+#  #####################################################################################################################
+#  Everything a game needs, made once and kept warm.
+#
+#  The App makes a PlayingScene the first time a game starts, and keeps it.  Every game after that just calls start(),
+#  which puts the simulation, the maze's pellets and the sprites back as they were in place: the sounds, the maze's
+#  tiles, the actors and their animations, the renderer's surfaces and the mixer are all still there from last time.
+#
+#  asset_loader() lists the files a scene is made from, for loading in the background before there is one.
+#  #####################################################################################################################
+
+SOUND_FILES = {"siren": "Pacman_Siren.wav",
+               "waka":  "Pacman_Waka_Waka.wav",
+               "intro": "Pacman_Intro.wav",
+               "die":   "Pacman_Death.wav"}
+SPRITESHEET_FILES = (os.path.join('pacman', 'img', 'sprites.png'),)
+FONTS = (("arcadeclassic", 18),)
+
+_sounds = {}  # filename (in pacman/sounds) -> Sound
+
+
+def get_sound(filename):
+    sound = _sounds.get(filename)
+    if sound is None:
+        sound = _sounds[filename] = load_sound(filename)
+    return sound
+
+
+def load_sound(filename):
+    return pygame.mixer.Sound(os.path.join('pacman', 'sounds', filename))
+
+
+def add_sound(filename, sound):
+    _sounds.setdefault(filename, sound)
+
+
+def clear_sounds():
+    # the cached sounds mustn't outlive the mixer
+    _sounds.clear()
+
+
+def asset_loader():
+    # An AssetLoader (not started yet) for everything a PlayingScene is made from.  The mixer has to be up before it
+    # starts, to decode the sounds
+    loader = AssetLoader()
+    for filename in SPRITESHEET_FILES:
+        loader.add(pygame.image.load, lambda image, filename=filename: add_spritesheet(filename, image.convert_alpha()), filename)
+    for filename in SOUND_FILES.values():
+        loader.add(load_sound, lambda sound, filename=filename: add_sound(filename, sound), filename)
+    for font_name, size in FONTS:
+        loader.add(load_font, lambda font, font_name=font_name, size=size: add_font(font_name, size, font), font_name, size)
+    return loader
+
+
+
+
+class PlayingScene:
+    def __init__(self, display_screen, prescaled=False):
+        # prescaled: draw with a ScaledRenderer, straight onto the display
+        #  sounds
+        pygame.mixer.init()
+        self.sounds = {name: get_sound(filename) for name, filename in SOUND_FILES.items()}
+        self.siren_channel = pygame.mixer.Channel(0)
+        self.waka_channel = pygame.mixer.Channel(1)
+        self.intro_channel = pygame.mixer.Channel(1)
+        self.die_channel = pygame.mixer.Channel(1)
+
+        #  the game, and the maze that shows it
+        self.sim = Simulation()
+        self.maze = Maze(self.sim.maze)
+        self.background = pygame.Surface(GAME_RESOLUTION.size)
+        self.maze.draw(self.background)  # draw the maze (the walls) onto the background surface
+
+        #  make the actors, and a group for the sprites
+        self.pacman = Pacman(self.sim.pacman, 30)
+        self.pacman_group = pygame.sprite.GroupSingle(self.pacman)
+        self.ghosts_group = pygame.sprite.Group(Blinky(self.sim.blinky, 20),
+                                                Pinky(self.sim.pinky, 20),
+                                                Inky(self.sim.inky, 20),
+                                                Clyde(self.sim.clyde, 20))
+
+        #  draws the game (the pellets baked in with the walls), and sends just the parts that change to the display
+        if prescaled:
+            self.renderer = ScaledRenderer(display_screen, self.background, self.maze)
+        else:
+            self.renderer = Renderer(display_screen, self.background, self.maze)
+
+        #  make the sounds and sprites follow what happens in the game
+        self.sim.events.subscribe(STATE_STARTED, self._state_started)
+        self.sim.events.subscribe(PACMAN_DIED, self._pacman_died)
+        self.sim.events.subscribe(PELLET_EATEN, self._pellet_eaten)
+
+    def start(self, display_screen):
+        # a brand new game, on display_screen
+        self.sim.reset()
+        self.maze.reset_pellets()
+        self._reset_sprites()
+        self.pacman.rewind_animation()
+        for ghost in self.ghosts_group:
+            ghost.rewind_animation()
+
+        self.renderer.bake_pellets()
+        self.renderer.resize(display_screen)
+
+    def _reset_sprites(self):
+        self.pacman.reset()
+        for ghost in self.ghosts_group:
+            ghost.reset()
+
+    def stop(self):
+        # the game's over (for now): quiet
+        self.siren_channel.stop()
+        self.waka_channel.stop()
+
+    def resize(self, display_screen):
+        self.renderer.resize(display_screen)
+
+    def draw(self):
+        # pick up where the simulation has put everyone, animate to match, and show it
+        renderer = self.renderer
+        if self.sim.state == "intro":
+            renderer.draw(render_text("Ready!", "arcadeclassic", 18, (255, 255, 0)), (100, 130))
+
+        self.pacman_group.update()
+        self.ghosts_group.update()
+
+        renderer.draw_group(self.pacman_group)
+        if self.pacman.current_animation_name != "die":
+            renderer.draw_group(self.ghosts_group)
+
+        renderer.present()  # scale what's changed up onto the display_screen, and update just that
+
+    #  --- event handlers ----------------------------------------------------------------------------------------------
+    def _state_started(self, state):
+        if state == "intro":
+            # self.intro_channel.set_volume(0)
+            self.intro_channel.play(self.sounds["intro"], 0)
+            self._reset_sprites()
+        elif state == "die":
+            self.die_channel.play(self.sounds["die"], 0)
+            self.pacman.die()
+        elif state == "play":
+            if self.siren_channel.get_sound() is None:
+                self.siren_channel.play(self.sounds["siren"], -1)
+
+    def _pacman_died(self):
+        self.siren_channel.stop()
+
+    def _pellet_eaten(self, r, c):
+        if self.waka_channel.get_sound() is None:
+            self.waka_channel.play(self.sounds["waka"], 0)
+
+        self.maze.hide_pellet(r, c)
+        self.renderer.erase_cell(r, c)
@@ -0,0 +1,815 @@
+import struct
+from pacman.game_settings import *
+from pacman.grid import *
+from pacman.paths import get_maze_paths
+from pacman.paths import FlowField
+from pacman.timer import Scheduler
+from pacman.Event import *
+
+
+#  #####################################################################################################################
+#  The game rules, as pure state.
+#
+#  Nothing in this module touches pygame: the maze, the actors, their movement, pellet eating, the chase/scatter
+#  schedule and collisions all live here, and time is counted in frames.  A Simulation can be stepped as fast as the
+#  CPU allows with no display, sound or clock.  The pygame side (App, Maze, the MazeActor sprites) just reads this
+#  state every frame and draws it.
+#  #####################################################################################################################
+
+
+#  Actor positions are integers, in 1/SUBPIXELS of a pixel, so movement is exact and runs come out the same on every
+#  machine.  96 makes both starting speeds a whole number of subpixels per frame (pacman 80, the ghosts 75).
+#  A tile is TILE_SUBPIXELS across.
+SUBPIXELS = 96
+TILE_SUBPIXELS = 8 * SUBPIXELS
+
+
+def frames_from_ms(ms):
+    return ms * FRAME_RATE // 1000
+
+
+#  snapshot() codes for headings, modes and states: the index in these tuples
+_SNAPSHOT_HEADINGS = ("", "up", "left", "down", "right")
+_SNAPSHOT_MODES = ("", "chase", "scatter")
+_SNAPSHOT_STATES = ("", "intro", "play", "die")
+
+
+
+
+class SimMaze:
+    def __init__(self, tile_map=MAZE_MAP):
+        self.tile_map = tile_map
+        self.grid = MazeGrid(tile_map)
+        self.num_rows = self.grid.num_rows
+        self.num_columns = self.grid.num_columns
+        self.actors = {}
+        self.occupants = {}  # (r, c) -> the actors on that tile, kept up to date by the actors as they change tile
+        self.__paths = None
+        self.__flow_field = None
+
+    @property
+    def paths(self):
+        # shortest path tables, shared by every maze with these walls, the first time they're asked for
+        if self.__paths is None:
+            self.__paths = get_maze_paths(self.grid)
+        return self.__paths
+
+    @property
+    def flow_field(self):
+        # the distance field towards pacman's tile that every actor can steer by.  Pacman keeps its target up to date
+        if self.__flow_field is None:
+            self.__flow_field = FlowField(self.paths)
+        return self.__flow_field
+
+    def add_actor(self, name, sim_actor):
+        self.actors[name] = sim_actor
+
+    def actors_on(self, tile):
+        return self.occupants.get(tile, ())
+
+    def move_occupant(self, actor, old_tile, new_tile):
+        occupants = self.occupants
+        if old_tile is not None:
+            on_tile = occupants[old_tile]
+            on_tile.remove(actor)
+            if not on_tile:
+                del occupants[old_tile]
+        occupants.setdefault(new_tile, []).append(actor)
+
+    def eat_pellet(self, r, c):
+        self.grid.eat(r, c)
+
+
+
+
+class SimActor:
+    def __init__(self, name, maze, starting_position, starting_heading="right", starting_movement_speed=0):
+        self.name = name
+
+        # used by the reset() method
+        self._starting_position = starting_position
+        self._starting_heading = starting_heading
+        self._starting_movement_speed = starting_movement_speed
+
+        self._maze = maze
+        self.fx = starting_position[0] * SUBPIXELS  # position, in subpixels
+        self.fy = starting_position[1] * SUBPIXELS
+        self.heading = starting_heading
+        self._movement_speed = 0
+        self._speed = 0            # subpixels per second
+        self._speed_remainder = 0  # subpixels * FRAME_RATE not yet moved, carried from frame to frame
+        self.movement_speed = starting_movement_speed
+        self._queued_heading = ""
+        self.frozen = False
+        self.mode = ""
+        self.tile = None  # the tile the maze has this actor down as occupying
+        self._update_tile()
+
+    def reset(self):
+        self._queued_heading = ""
+        self.fx = self._starting_position[0] * SUBPIXELS
+        self.fy = self._starting_position[1] * SUBPIXELS
+        self.movement_speed = self._starting_movement_speed
+        self._speed_remainder = 0
+        self.heading = self._starting_heading
+        self.frozen = False
+        self._update_tile()
+
+    @property
+    def x(self):
+        return self.fx / SUBPIXELS
+
+    @property
+    def y(self):
+        return self.fy / SUBPIXELS
+
+    @property
+    def movement_speed(self):
+        return self._movement_speed  # in pixels per second
+
+    @movement_speed.setter
+    def movement_speed(self, rhs):
+        self._movement_speed = float(rhs)
+        self._speed = int(round(rhs * SUBPIXELS))
+
+    def freeze(self):
+        self.frozen = True
+
+    def thaw(self):
+        self.frozen = False
+
+    def scatter(self):
+        self.mode = "scatter"
+        self._turn_around()
+
+    def chase(self):
+        self.mode = "chase"
+        self._turn_around()
+
+    def _turn_around(self):
+        if self.heading == "up":
+            self.set_desired_heading("down")
+        elif self.heading == "left":
+            self.set_desired_heading("right")
+        elif self.heading == "right":
+            self.set_desired_heading("left")
+        elif self.heading == "down":
+            self.set_desired_heading("up")
+
+    def set_heading(self, new_heading):
+        self.heading = new_heading
+
+    def set_desired_heading(self, new_desired_heading):
+        self._queued_heading = new_desired_heading
+
+    def cancel_desired_heading(self):
+        if self._queued_heading != "":
+            self._queued_heading = ""
+
+    #  --- snapshots ---------------------------------------------------------------------------------------------------
+    #  x, y, speed (subpixels), speed remainder, heading, queued heading, mode, flags
+    SNAPSHOT_RECORD = struct.Struct("<iiiHBBBB")
+
+    def snapshot(self):
+        return self.SNAPSHOT_RECORD.pack(self.fx, self.fy, self._speed, self._speed_remainder,
+                                         _SNAPSHOT_HEADINGS.index(self.heading),
+                                         _SNAPSHOT_HEADINGS.index(self._queued_heading),
+                                         _SNAPSHOT_MODES.index(self.mode),
+                                         self._snapshot_flags())
+
+    def restore(self, record):
+        fx, fy, speed, speed_remainder, heading, queued_heading, mode, flags = self.SNAPSHOT_RECORD.unpack(record)
+        self.fx = fx
+        self.fy = fy
+        self.movement_speed = speed / SUBPIXELS
+        self._speed_remainder = speed_remainder
+        self.heading = _SNAPSHOT_HEADINGS[heading]
+        self._queued_heading = _SNAPSHOT_HEADINGS[queued_heading]
+        self.mode = _SNAPSHOT_MODES[mode]
+        self._restore_flags(flags)
+        self._update_tile()
+
+    def _snapshot_flags(self):
+        return 1 if self.frozen else 0
+
+    def _restore_flags(self, flags):
+        self.frozen = bool(flags & 1)
+
+    def current_tile_address(self):
+        # (r, c) of the tile under the actor's centre
+        return (self.fy + 7 * SUBPIXELS) // TILE_SUBPIXELS, (self.fx + 7 * SUBPIXELS) // TILE_SUBPIXELS % self._maze.num_columns
+
+    def _update_tile(self):
+        # move this actor in the maze's occupancy index, if it's changed tile
+        tile = self.current_tile_address()
+        if tile != self.tile:
+            self._maze.move_occupant(self, self.tile, tile)
+            self.tile = tile
+
+    def get_target_coordinate(self):
+        pass
+
+    def get_next_heading(self, target_coordinate):
+        # Pick the exit out of the current tile that lands closest to the target.  The exits (walls, no turning
+        # back, the no-up/no-down special cases) all come from the precompiled table; distances stay squared.
+        grid = self._maze.grid
+        num_columns = grid.num_columns
+        r, c = self.current_tile_address()
+        exits = grid.exits[r * num_columns + c] & ~REVERSE_EXITS[self.heading]
+
+        tx, ty = target_coordinate
+        min_distance_to_target = 999999 ** 2
+        next_heading = self.heading
+
+        for heading, exit_bit, dr, dc in EXIT_ORDER:
+            if exits & exit_bit:
+                dx = tx - ((c + dc) % num_columns * 8 + 4)
+                dy = ty - ((r + dr) * 8 + 4)
+                d = dx * dx + dy * dy
+                if d < min_distance_to_target:
+                    min_distance_to_target = d
+                    next_heading = heading
+
+        return next_heading
+
+    def flow_field_heading(self):
+        # A drop-in for get_next_heading() in subclasses that want to chase pacman along the shortest path rather
+        # than by straight-line distance.  Reads the maze's shared flow field, so it costs the same for any number
+        # of actors.
+        grid = self._maze.grid
+        r, c = self.current_tile_address()
+        exits = grid.exits[r * grid.num_columns + c] & ~REVERSE_EXITS[self.heading]
+        next_heading = self._maze.flow_field.heading_from(r, c, exits)
+        if next_heading == "":
+            next_heading = self.heading
+
+        return next_heading
+
+
+    def update(self):
+        # Move on by a frame.  A frozen actor stays put until something asks it to go somewhere
+        if self._queued_heading == "" and self.frozen:
+            self._visit(self.fx, self.fy)
+        else:
+            self._update_frame()
+
+        self._update_tile()
+
+    def _visit(self, fx, fy):
+        # called with the position at the start of every frame, in case a subclass wants to look at what's there
+        pass
+
+    def _corridor(self):
+        c = (self.fx + 4 * SUBPIXELS) // TILE_SUBPIXELS
+        if c <= 0 and self.heading == "left":
+            self.fx += (self._maze.num_columns * 8 - 16) * SUBPIXELS
+        elif c >= 30 and self.heading == "right":
+            self.fx -= (self._maze.num_columns * 8 - 16) * SUBPIXELS
+
+    def _update_frame(self):
+        self._visit(self.fx, self.fy)
+
+        queued_heading = self._queued_heading
+        if queued_heading == "":
+            queued_heading = self.heading
+
+
+        # Solve the move in 2 parts.  Part 1 is the distance towards the next tile.
+        # Part 2 handles the distance if the actor moves into another tile
+        # It's possible that the actor starts off exactly at a tile edge.  If so, the part 1 distance is zero
+        # Part 2 has to handle walls.
+        # If we enter part 2 with a turn requested, and the turn would hit a wall, then we ignore the request as if it's not made
+        # as if no turn request was made.  Going straight forward might run into a wall.  If so, then set part 2 distance to zero (and stop)
+        # Remember, that in 99.99% of cases part 1 is just a straight move forward, and part 2 is zero.
+        # At speeds of more than a tile per frame, part 2 can reach further tile breaks.  Each of those is handled as
+        # another part 1 of exactly one tile, followed by another part 2.
+
+        start_fx = self.fx
+        start_fy = self.fy
+        cx = self.fx + 4 * SUBPIXELS
+        cy = self.fy + 4 * SUBPIXELS
+
+        dx1 = 0  # delta-x, part 1
+        dy1 = 0  # delta-y, part 1
+
+        dx2 = 0  # delta-x, part 2
+        dy2 = 0  # delta-y, part 2
+
+        # p is the total distance (in subpixels) to move during this frame.  Speeds rarely divide evenly into frames,
+        # so whatever doesn't make it into this frame's whole subpixels is carried over into the next frame's.
+        p, self._speed_remainder = divmod(self._speed + self._speed_remainder, FRAME_RATE)
+
+
+        # -------------------------------------------------------------------------------
+        # part 1:  Get to next tile, or an instant 180 degree turnaround
+        # -------------------------------------------------------------------------------
+        distance_to_next_tile = 0
+        if self.heading == "up" or (self.heading == "down" and queued_heading == "up"):
+            distance_to_next_tile = cy % TILE_SUBPIXELS
+            if p > distance_to_next_tile:
+                dy1 = -distance_to_next_tile
+            else:
+                dy1 = -p
+        elif self.heading == "down" or (self.heading == "up" and queued_heading == "down"):
+            distance_to_next_tile = -cy % TILE_SUBPIXELS
+            if p > distance_to_next_tile:
+                dy1 = distance_to_next_tile
+            else:
+                dy1 = p
+        if self.heading == "left" or (self.heading == "right" and queued_heading == "left"):
+            distance_to_next_tile = cx % TILE_SUBPIXELS
+            if p > distance_to_next_tile:
+                dx1 = -distance_to_next_tile
+            else:
+                dx1 = -p
+        elif self.heading == "right" or (self.heading == "left" and queued_heading == "right"):
+            distance_to_next_tile = -cx % TILE_SUBPIXELS
+            if p > distance_to_next_tile:
+                dx1 = distance_to_next_tile
+            else:
+                dx1 = p
+
+        # -------------------------------------------------------------------------------
+        # part 2:  Past the tile break (maybe a turn?)
+        # -------------------------------------------------------------------------------
+        while abs(dx1 + dy1) < p:
+            target_coordinate = self.get_target_coordinate()
+            queued_heading = self.get_next_heading(target_coordinate)
+            if queued_heading == "":
+                queued_heading = self.heading
+
+            # which tile are we in after part 1?
+            grid = self._maze.grid
+            r = (cy + dy1) // TILE_SUBPIXELS
+            c = (cx + dx1) // TILE_SUBPIXELS
+
+            # if we have a 90 degree turn requested, and that turn puts us into a wall, then behave as if the request wasn't made
+            if ((self.heading == "left" or self.heading == "right") and (queued_heading == "up" or queued_heading == "down")) \
+            or ((self.heading == "up" or self.heading == "down") and (queued_heading == "left" or queued_heading == "right")):
+                dr, dc = HEADING_OFFSETS[queued_heading]
+                if grid.is_wall(r + dr, c + dc):
+                    queued_heading = self.heading  # ** we check to see that we did this later.  see note
+
+            # is the neighbour tile we're heading towards a wall?
+            dr, dc = HEADING_OFFSETS[queued_heading]
+            if grid.is_wall(r + dr, c + dc):
+                dx2 = 0
+                dy2 = 0
+                self._speed_remainder = 0  # stopped short at the wall, so nothing carries over
+            else:
+                if queued_heading == "up":
+                    dx2 = 0
+                    dy2 = -p - dy1
+                elif queued_heading == "down":
+                    dx2 = 0
+                    dy2 = p - dy1
+                elif queued_heading == "left":
+                    dx2 = -p - dx1
+                    dy2 = 0
+                elif queued_heading == "right":
+                    dx2 = p - dx1
+                    dy2 = 0
+
+                if queued_heading != self.heading:
+                    self.set_heading(queued_heading)
+                    self.cancel_desired_heading()  # cancel the request - we handled it.
+
+            if abs(dx2 + dy2) <= TILE_SUBPIXELS:
+                break
+
+            # part 2 runs on past another tile break: go a tile into it, and decide again from there, seen from just
+            # short of the break as a frame-by-frame update would have seen it
+            p = abs(dx2 + dy2)
+            cx += dx1
+            cy += dy1
+            dr, dc = HEADING_OFFSETS[queued_heading]
+            dx1 = dc * TILE_SUBPIXELS
+            dy1 = dr * TILE_SUBPIXELS
+            dx2 = 0
+            dy2 = 0
+            self.fx = cx + dx1 - dc - 4 * SUBPIXELS
+            self.fy = cy + dy1 - dr - 4 * SUBPIXELS
+            self._visit(self.fx, self.fy)
+
+        # Was this a 180 turnaround?
+        if (self.heading == "down" and queued_heading == "up") \
+        or (self.heading == "up" and queued_heading == "down") \
+        or (self.heading == "left" and queued_heading == "right") \
+        or (self.heading == "right" and queued_heading == "left"):
+            self.set_heading(queued_heading)
+            self.cancel_desired_heading()  # cancel the request - we handled it.
+
+        self.fx = cx + dx1 + dx2 - 4 * SUBPIXELS
+        self.fy = cy + dy1 + dy2 - 4 * SUBPIXELS
+
+        if not self.frozen and self.fx == start_fx and self.fy == start_fy:
+            self.freeze()
+        elif self.frozen:
+            self.thaw()
+
+        self._corridor()
+
+
+
+
+class SimPacman(SimActor):
+    def __init__(self, maze, starting_position, starting_heading="right", starting_movement_speed=0):
+        super().__init__("Pacman", maze, starting_position, starting_heading, starting_movement_speed)
+        self.dying = False
+        self.eats_pellets = False  # switched on by whoever is running the game
+        self.eaten = []            # (r, c) of pellets eaten, for whoever is running the game to clear when it likes
+        self._update_flow_field()
+
+    def reset(self):
+        super().reset()
+        self.dying = False
+        self._update_flow_field()
+
+    def die(self):
+        self.dying = True
+        self.movement_speed = 0
+
+    def _snapshot_flags(self):
+        return super()._snapshot_flags() | (2 if self.dying else 0)
+
+    def _restore_flags(self, flags):
+        super()._restore_flags(flags)
+        self.dying = bool(flags & 2)
+
+    def get_next_heading(self, target_coordinate):
+        return self._queued_heading
+
+    def _update_flow_field(self):
+        r, c = self.tile
+        self._maze.flow_field.set_target(r, c)
+
+    def _visit(self, fx, fy):
+        #  --- Are we far enough into this tile to have eaten a pellet? ------------------
+        #  A tile with a pellet is 8x8 like this:
+        #  00000000
+        #  00000000
+        #  00000000
+        #  00011000
+        #  00011000
+        #  00000000
+        #  00000000
+        #  00000000
+        if not self.eats_pellets:
+            return
+
+        x = fx // SUBPIXELS
+        y = fy // SUBPIXELS
+        eat = False
+        grid = self._maze.grid
+        r, c = grid.address_from_screen((x + 4, y + 4))
+        if self.heading == "left":
+            eat = x + 4 < c * 8 + 4
+        elif self.heading == "right":
+            c += 1
+            eat = x + 4 + 7 >= c * 8 + 4
+        elif self.heading == "up":
+            eat = y + 4 < r * 8 + 4
+        elif self.heading == "down":
+            r += 1
+            eat = y + 4 + 7 >= r * 8 + 4
+
+        if eat and grid.has_pellet(r, c):
+            self._maze.eat_pellet(r, c)
+            self.eaten.append((r, c % grid.num_columns))
+
+    def update(self):
+        super().update()
+        if self.dying:
+            self.thaw()  # keep the death animation playing
+        self._update_flow_field()
+
+
+
+
+class SimGhost(SimActor):
+    def __init__(self, name, maze, starting_position, starting_heading="right", starting_movement_speed=0):
+        super().__init__(name, maze, starting_position, starting_heading, starting_movement_speed)
+        self.mode = "chase"
+
+    def reset(self):
+        self.mode = "chase"
+        super().reset()
+
+
+
+
+class SimBlinky(SimGhost):
+    def __init__(self, maze, starting_position, starting_heading="right", starting_movement_speed=0):
+        super().__init__("Blinky", maze, starting_position, starting_heading, starting_movement_speed)
+
+    def get_target_coordinate(self):
+        if self.mode == "chase":
+            return self._maze.flow_field.target_center()
+        elif self.mode == "scatter":
+            return 220, -12
+
+
+
+
+class SimPinky(SimGhost):
+    def __init__(self, maze, starting_position, starting_heading="right", starting_movement_speed=0):
+        super().__init__("Pinky", maze, starting_position, starting_heading, starting_movement_speed)
+
+    def get_target_coordinate(self):
+        if self.mode == "chase":
+            pacman = self._maze.actors["Pacman"]
+            p1_x, p1_y = self._maze.flow_field.target_center()
+            dr, dc = HEADING_OFFSETS[pacman.heading]
+            p1_x += dc * 4 * 8
+            p1_y += dr * 4 * 8
+
+            if pacman.heading == "up":
+                p1_x = p1_x - 32
+
+            return p1_x, p1_y
+
+        elif self.mode == "scatter":
+            return 36, -12
+
+
+
+
+class SimInky(SimGhost):
+    def __init__(self, maze, starting_position, starting_heading="right", starting_movement_speed=0):
+        super().__init__("Inky", maze, starting_position, starting_heading, starting_movement_speed)
+
+    def get_target_coordinate(self):
+        if self.mode == "chase":
+            pacman = self._maze.actors["Pacman"]
+            blinky = self._maze.actors["Blinky"]
+
+            p1_x, p1_y = self._maze.flow_field.target_center()
+            dr, dc = HEADING_OFFSETS[pacman.heading]
+            p1_x += dc * 2 * 8
+            p1_y += dr * 2 * 8
+            if pacman.heading == "up":
+                p1_x = p1_x - 16
+
+            blinky_r, blinky_c = blinky.current_tile_address()
+            p2_x = blinky_c * 8 + 4
+            p2_y = blinky_r * 8 + 4
+
+            # target point:
+            # start at p2, head to p1, and double the distance
+            xy = (p1_x + (p1_x - p2_x), p1_y + (p1_y - p2_y))
+            return xy
+
+        elif self.mode == "scatter":
+            return 236, 260
+
+
+
+
+class SimClyde(SimGhost):
+    def __init__(self, maze, starting_position, starting_heading="right", starting_movement_speed=0):
+        super().__init__("Clyde", maze, starting_position, starting_heading, starting_movement_speed)
+
+    def get_target_coordinate(self):
+        if self.mode == "chase":
+            flow_field = self._maze.flow_field
+            r, c = self.current_tile_address()
+
+            dx = (flow_field.target_c - c) * 8
+            dy = (flow_field.target_r - r) * 8
+            if dx * dx + dy * dy < (8 * 8) ** 2:
+                xy = 4, 260
+            else:
+                xy = flow_field.target_center()
+
+            return xy
+
+        elif self.mode == "scatter":
+            return 20, 260
+
+
+
+
+#  #####################################################################################################################
+#  One game, stepped a frame (or several) at a time.
+#
+#  The state machine is the one the game has always had:
+#
+#      "intro"   everyone frozen at their starting positions for INTRO_TIME
+#      "play"    pacman follows the requested direction, eats pellets, and the ghosts switch between scatter and
+#                chase on CHASE_SCATTER_SCHEDULE.  Pacman sharing a tile with a ghost -> "die"
+#      "die"     pacman stops and plays out his death for DIE_TIME, then back to "intro"
+#
+#  After each step(), started_state, collided and eaten describe what happened during it.  The same things are
+#  published on self.events as they happen (see Event.py), for whoever is presenting the game to play sounds and stop
+#  drawing pellets without checking every frame.
+#  #####################################################################################################################
+class Simulation:
+    def __init__(self, tile_map=MAZE_MAP):
+        self.maze = SimMaze(tile_map)
+
+        self.pacman = SimPacman(self.maze, PACMAN_STARTING_POSITION, "left", PACMAN_STARTING_SPEED)
+        self.blinky = SimBlinky(self.maze, GHOST_STARTING_POSITION, "right", GHOST_STARTING_SPEED)
+        self.pinky = SimPinky(self.maze, GHOST_STARTING_POSITION, "left", GHOST_STARTING_SPEED)
+        self.inky = SimInky(self.maze, GHOST_STARTING_POSITION, "left", GHOST_STARTING_SPEED)
+        self.clyde = SimClyde(self.maze, GHOST_STARTING_POSITION, "left", GHOST_STARTING_SPEED)
+
+        self.ghosts = [self.blinky, self.pinky, self.inky, self.clyde]
+        self.actors = [self.pacman] + self.ghosts
+        for actor in self.actors:
+            self.maze.add_actor(actor.name, actor)
+
+        # the chase/scatter switches still to come in the current "play" state, on a clock of state_frame
+        self._mode_timers = Scheduler()
+
+        self.events = EventBus()
+
+        self.reset()
+
+    def reset(self):
+        # back to the start of a brand new game, with every pellet in place
+        self.maze.grid.reset_pellets()
+        for actor in self.actors:
+            actor.reset()
+            actor.freeze()
+        for ghost in self.ghosts:
+            ghost.mode = "scatter"
+
+        self.frame = 0          # frames stepped since the start
+        self.state = "intro"
+        self.state_frame = 0    # frames since the current state started
+        self.first_pass = True  # the next step is the first one in this state
+        self._prev_state = ""
+        self._mode_timers.clear()
+
+        # what happened during the last step
+        self.started_state = ""
+        self.collided = False
+        self.eaten = []
+
+    def pellets_remaining(self):
+        return self.maze.grid.pellets_remaining()
+
+    def pacman_caught(self):
+        # Is a ghost on pacman's tile?  During "play", the next step() finds that as the collision
+        for actor in self.maze.actors_on(self.pacman.tile):
+            if isinstance(actor, SimGhost):
+                return True
+        return False
+
+    #  --- snapshots ---------------------------------------------------------------------------------------------------
+    #  A snapshot is the whole game state as a few hundred bytes:
+    #
+    #      header     frame, state_frame, state, previous state, first_pass, mode switches still to come
+    #      actors     one SimActor.SNAPSHOT_RECORD each, in self.actors order
+    #      pellets    MazeGrid.eaten_bits()
+    #
+    #  restore() puts any snapshot of a game on the same maze back exactly, so stepping on from there goes just the
+    #  way it went from the original.  What happened during the last step (started_state, collided, eaten) isn't
+    #  part of it.
+    SNAPSHOT_HEADER = struct.Struct("<IIBBBB")
+
+    def snapshot(self):
+        parts = [self.SNAPSHOT_HEADER.pack(self.frame, self.state_frame,
+                                           _SNAPSHOT_STATES.index(self.state),
+                                           _SNAPSHOT_STATES.index(self._prev_state),
+                                           1 if self.first_pass else 0,
+                                           len(self._mode_timers))]
+        for actor in self.actors:
+            parts.append(actor.snapshot())
+        parts.append(self.maze.grid.eaten_bits())
+        return b"".join(parts)
+
+    def restore(self, snapshot):
+        frame, state_frame, state, prev_state, first_pass, schedule_left = self.SNAPSHOT_HEADER.unpack_from(snapshot)
+        self.frame = frame
+        self.state_frame = state_frame
+        self.state = _SNAPSHOT_STATES[state]
+        self._prev_state = _SNAPSHOT_STATES[prev_state]
+        self.first_pass = bool(first_pass)
+        self._schedule_modes(CHASE_SCATTER_SCHEDULE[len(CHASE_SCATTER_SCHEDULE) - schedule_left:])
+
+        offset = self.SNAPSHOT_HEADER.size
+        for actor in self.actors:
+            size = actor.SNAPSHOT_RECORD.size
+            actor.restore(snapshot[offset:offset + size])
+            offset += size
+        self.maze.grid.set_eaten_bits(snapshot[offset:])
+        self.pacman._update_flow_field()
+
+        self.started_state = ""
+        self.collided = False
+        self.eaten = []
+
+    def step(self, direction="", frames=1):
+        # Advance the game by frames frames (normally one).  direction is the way the player is pushing ("up", "down",
+        # "left", "right"), or "" for no input, held for all of them.
+        # A step of several frames is exactly that many single steps: every frame gets the rules (input, collisions,
+        # the mode schedule, state changes) and moves the actors in turn.  Afterwards started_state (the last state
+        # started), collided and eaten cover all of its frames.
+        started_state = ""
+        collided = False
+        eaten = []
+        for _ in range(frames):
+            self._step_frame(direction, eaten)
+            if self.started_state:
+                started_state = self.started_state
+            collided = collided or self.collided
+
+        self.started_state = started_state
+        self.collided = collided
+        self.eaten = eaten
+
+    def _step_frame(self, direction, eaten):
+        # one frame, adding the pellets eaten during it to eaten
+        self.started_state = self.state if self.first_pass else ""
+        self.collided = False
+        self.pacman.eaten = eaten
+        num_eaten = len(eaten)
+        self.pacman.eats_pellets = self.state == "play"
+        if self.state == "intro":
+            self._intro()
+        elif self.state == "die":
+            self._die()
+        elif self.state == "play":
+            self._play(direction)
+        if self.started_state:
+            self.events.publish(STATE_STARTED, self.started_state)
+
+        for actor in self.actors:
+            actor.update()
+
+        if len(eaten) > num_eaten:
+            for r, c in eaten[num_eaten:]:
+                self.events.publish(PELLET_EATEN, r, c)
+            if self.maze.grid.cells.count(TILE_PELLET) == 0:
+                self.events.publish(LEVEL_CLEARED)
+
+        self.frame += 1
+        if self._prev_state != self.state:
+            self.first_pass = True
+            self.state_frame = 0
+        else:
+            self.first_pass = False
+            self.state_frame += 1
+
+        self._prev_state = self.state
+
+    #  --- states ------------------------------------------------------------------------------------------------------
+    def _intro(self):
+        if self.first_pass:
+            for actor in self.actors:
+                actor.reset()
+            for actor in self.actors:
+                actor.freeze()
+        elif self.state_frame >= frames_from_ms(INTRO_TIME):
+            self.state = "play"
+
+    def _die(self):
+        if self.first_pass:
+            self.pacman.die()
+        elif self.state_frame > frames_from_ms(DIE_TIME):
+            self.state = "intro"
+
+    def _play(self, direction):
+        pacman = self.pacman
+
+        if self.first_pass:
+            # start in scatter mode
+            for ghost in self.ghosts:
+                ghost.scatter()
+            self.events.publish(MODE_CHANGED, "scatter")
+
+            self._schedule_modes(CHASE_SCATTER_SCHEDULE)
+
+            for actor in self.actors:
+                actor.thaw()
+
+        #  --- Any pacman/ghost collision? --------------------------------
+        if self.pacman_caught():
+            self.collided = True
+            self._mode_timers.clear()
+            self.state = "die"
+            self.events.publish(PACMAN_DIED)
+
+        #  --- Time to switch between chase and scatter? ------------------
+        for timer in self._mode_timers.advance_to(self.state_frame):
+            mode = timer.tag
+            for ghost in self.ghosts:
+                if mode == "chase":
+                    ghost.chase()
+                elif mode == "scatter":
+                    ghost.scatter()
+            self.events.publish(MODE_CHANGED, mode)
+
+        #  --- Where to next for pacman? ----------------------------------
+        if direction != "":
+            pacman.set_desired_heading(direction)
+        else:
+            pacman.cancel_desired_heading()
+
+    def _schedule_modes(self, schedule):
+        # (ms into the "play" state, mode) -> a timer due on that state_frame, tagged with the mode
+        self._mode_timers.clear()
+        self._mode_timers.tick = self.state_frame
+        for ms, mode in schedule:
+            self._mode_timers.schedule_at(frames_from_ms(ms), mode)
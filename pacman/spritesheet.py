@@ -1,8 +1,33 @@
 import pygame
 
+
+#  Every sheet is loaded (and converted) once per process: get_spritesheet() hands out the same Spritesheet to
+#  everyone who asks for the same file, and a sheet hands out the same frame to everyone who asks for the same
+#  rectangle.  Frames are shared, so draw them, but don't draw on them.
+_spritesheets = {}  # filename -> Spritesheet
+
+
+def get_spritesheet(filename):
+    spritesheet = _spritesheets.get(filename)
+    if spritesheet is None:
+        spritesheet = _spritesheets[filename] = Spritesheet(filename)
+    return spritesheet
+
+
+def add_spritesheet(filename, sheet_image):
+    # a sheet that's already been loaded (and converted) elsewhere, for get_spritesheet() to hand out
+    if filename not in _spritesheets:
+        _spritesheets[filename] = Spritesheet(filename, sheet_image)
+
+
+
+
 class Spritesheet(object):
-    def __init__(self, filename):
-        self.sheet_image = pygame.image.load(filename).convert_alpha()
+    def __init__(self, filename, sheet_image=None):
+        if sheet_image is None:
+            sheet_image = pygame.image.load(filename).convert_alpha()
+        self.sheet_image = sheet_image
+        self._frames = {}  # (x, y, width, height) -> subsurface of sheet_image
 
     # Load a specific image from a specific rectangle
     def image_at(self, rectangle):
@@ -13,5 +38,8 @@ class Spritesheet(object):
         #return image
 
         rect = pygame.Rect(rectangle)
-        i = self.sheet_image.subsurface(rect)
+        key = tuple(rect)
+        i = self._frames.get(key)
+        if i is None:
+            i = self._frames[key] = self.sheet_image.subsurface(rect)
         return i
@@ -0,0 +1,46 @@
+import pygame
+import os
+import functools
+
+
+#  Text, drawn with the fonts in pacman/fonts.  Fonts are opened once per (name, size), and the last TEXT_CACHE_SIZE
+#  strings rendered are kept, so text drawn every frame costs a dictionary lookup.
+
+TEXT_CACHE_SIZE = 256  # rendered strings kept by render_text()
+FONT_FILES = {"arcadeclassic": "ARCADECLASSIC.TTF",
+              "emulogic":      "emulogic.ttf"}
+
+_fonts = {}  # (font_name, size) -> Font
+
+
+def render_text(text, font_name, size, color):
+    # The text as a surface.  These are cached, so the same text in the same font and colour comes back as the same
+    # surface: draw it, but don't draw on it
+    return _render_text(text, font_name, size, tuple(color))
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _render_text(text, font_name, size, color):
+    return get_font(font_name, size).render(text, False, color)
+
+
+def get_font(font_name, size):
+    font = _fonts.get((font_name, size))
+    if font is None:
+        font = _fonts[(font_name, size)] = load_font(font_name, size)
+    return font
+
+
+def load_font(font_name, size):
+    return pygame.font.Font(os.path.join("pacman", "fonts", FONT_FILES[font_name]), size)
+
+
+def add_font(font_name, size, font):
+    # a font that's already been loaded elsewhere, for get_font() to hand out
+    _fonts.setdefault((font_name, size), font)
+
+
+def clear_cache():
+    # the cached fonts (and text) mustn't outlive pygame.font
+    _render_text.cache_clear()
+    _fonts.clear()
@@ -1,95 +1,145 @@
-import pygame
+import heapq
+import itertools
 
 
+#  #####################################################################################################################
+#  Timers on a tick clock.
+#
+#  A Scheduler's clock only moves when it's told to (the game advances it a frame at a time), so timers run at
+#  whatever speed the game is stepped at, and stop when it stops.  Timers sit in a heap of
+#  (due tick, sequence number, timer), so the next one due is always on top, and the sequence number keeps timers
+#  due on the same tick in the order they were scheduled.
+#
+#  Cancelling or pausing a timer doesn't touch the heap: its entry is just left behind, and dropped when it reaches
+#  the top.  Resuming a timer pushes a fresh entry.
+#  #####################################################################################################################
 
 
-class TimerManager:
-    def __init__(self):
-        self.timers = {}
-
-    def add_timer(self, key, countdown_time, start_immediately_yn, tag):
-        self.timers[key] = Timer(countdown_time, start_immediately_yn, tag)
-
-    def remove_timer(self, key):
-        del self.timers[key]
-
-    def remove_elapsed_timers(self):
-        for key, val in self.timers.items():
-            if val.get_state() == "elapsed":
-                del self.timers[key]
-
-    def get_elapsed_timers(self):
-        elapsed_timers = {}
-        for key, val in self.timers.items():
-            if val.get_state() == "elapsed":
-                elapsed_timers[key] = val
-
-        return elapsed_timers
-
-    def start_all(self):
-        for key, val in self.timers.items():
-            val.start()
-
-    def stop_all(self):
-        for key, val in self.timers.items():
-            val.stop()
-
-    def reset_all(self):
-        for key, val in self.timers.items():
-            val.reset()
 
 
 class Timer:
-    def __init__(self, countdown_time, start_immediately_yn, tag):
-        self._running = False
-        self._original_countdown_time = countdown_time
-        self._time_remaining = countdown_time
-        self._end_time = 0
-        self._start_time = 0
+    def __init__(self, scheduler, due, tag, callback):
+        self._scheduler = scheduler
+        self.due = due              # the tick it goes off on (while running)
         self.tag = tag
-        if start_immediately_yn:
-            self.start()
-
-    def get_state(self):
-        tr = self.get_time_remaining()
-        if self._running and tr > 0:
-            return "running"
-        elif self._running and tr <= 0:
-            return "elapsed"
-        else:
-            return "stopped"
-
-    def set_countdown_time(self, countdown_time):
-        self._original_countdown_time = countdown_time
-        self._time_remaining = countdown_time
-        if self._running:
-            self.start()
-
-    def _update_time_remaining(self):
-        if self._running:
-            t = pygame.time.get_ticks()
-            if t < self._end_time:
-                self._time_remaining = self._end_time - t
-            else:
-                self._time_remaining = 0
-
-    def reset(self):
-        self._time_remaining = self._original_countdown_time
-
-    def start(self):
-        self._start_time = pygame.time.get_ticks()
-        self._end_time = self._start_time + self._time_remaining
-        self._running = True
-
-    def stop(self):
-        self._update_time_remaining()
-        self._running = False
+        self.callback = callback    # called with the timer when it goes off, or None
+        self.state = "running"      # "running", "paused", "elapsed" or "cancelled"
+        self._remaining = 0         # ticks still to go, while paused
+        self._entry = -1            # sequence number of this timer's live heap entry
 
     def get_time_remaining(self):
-        self._update_time_remaining()
-        return self._time_remaining
-
-    def get_elapsed_time(self):
-        return pygame.time.get_ticks() - self._start_time
-
-
+        if self.state == "running":
+            return max(0, self.due - self._scheduler.tick)
+        elif self.state == "paused":
+            return self._remaining
+        return 0
+
+    def cancel(self):
+        self._scheduler.cancel(self)
+
+    def pause(self):
+        self._scheduler.pause_timer(self)
+
+    def resume(self):
+        self._scheduler.resume_timer(self)
+
+
+
+
+class Scheduler:
+    def __init__(self, tick=0):
+        self.tick = tick
+        self.paused = False
+        self._heap = []
+        self._timers = set()  # running and paused timers
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._timers)
+
+    #  --- timers ------------------------------------------------------------------------------------------------------
+    def schedule(self, delay, tag=None, callback=None):
+        # a timer that goes off delay ticks from now
+        return self.schedule_at(self.tick + delay, tag, callback)
+
+    def schedule_at(self, due, tag=None, callback=None):
+        timer = Timer(self, due, tag, callback)
+        self._timers.add(timer)
+        self._push(timer)
+        return timer
+
+    def cancel(self, timer):
+        if timer in self._timers:
+            self._timers.remove(timer)
+            timer.state = "cancelled"
+
+    def pause_timer(self, timer):
+        if timer.state == "running" and timer in self._timers:
+            timer._remaining = max(0, timer.due - self.tick)
+            timer.state = "paused"
+
+    def resume_timer(self, timer):
+        if timer.state == "paused" and timer in self._timers:
+            timer.due = self.tick + timer._remaining
+            timer.state = "running"
+            self._push(timer)
+
+    def clear(self):
+        for timer in self._timers:
+            timer.state = "cancelled"
+        self._timers.clear()
+        self._heap = []
+
+    #  --- the clock ---------------------------------------------------------------------------------------------------
+    def pause(self):
+        # stop the clock: advance() and advance_to() do nothing until resume()
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def next_due(self):
+        # the tick the next running timer goes off on, or None
+        self._drop_stale()
+        if self._heap:
+            return self._heap[0][0]
+        return None
+
+    def advance(self, ticks=1):
+        return self.advance_to(self.tick + ticks)
+
+    def advance_to(self, tick):
+        # Move the clock on to tick, and return the timers that went off on the way, in the order they were due.
+        # Each one's callback is called as it goes off
+        if self.paused:
+            return []
+
+        self.tick = tick
+        heap = self._heap
+        elapsed = []
+        while True:
+            self._drop_stale()
+            if not heap or heap[0][0] > tick:
+                break
+
+            timer = heapq.heappop(heap)[2]
+            self._timers.remove(timer)
+            timer.state = "elapsed"
+            elapsed.append(timer)
+            if timer.callback is not None:
+                timer.callback(timer)
+
+        return elapsed
+
+    def _push(self, timer):
+        timer._entry = next(self._sequence)
+        heapq.heappush(self._heap, (timer.due, timer._entry, timer))
+
+    def _drop_stale(self):
+        # pop entries left behind by cancelled, paused or rescheduled timers off the top of the heap
+        heap = self._heap
+        while heap:
+            due, entry, timer = heap[0]
+            if timer.state == "running" and timer._entry == entry:
+                return
+            heapq.heappop(heap)